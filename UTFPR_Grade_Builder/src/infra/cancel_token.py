@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import contextlib
 import threading
 from collections.abc import Callable
 
@@ -52,3 +53,8 @@ class CancelToken:
                 callback()
             except Exception:
                 pass
+
+    def unregister_cancel_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            with contextlib.suppress(ValueError):
+                self._callbacks.remove(callback)
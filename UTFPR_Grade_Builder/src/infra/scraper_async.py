@@ -3,18 +3,24 @@
 import asyncio
 import contextlib
 import difflib
+import functools
 import html as html_lib
+import json
 import logging
+import operator
+import os
+import random
 import re
 import time
 import unicodedata
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator, Sequence
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Any, Protocol
+from typing import TYPE_CHECKING, Any, Protocol
 from urllib.parse import urljoin
 
-from src.core.models import Turma
+from src.core.models import HorarioSlot, Turma
 from src.core.schedule import parse_horarios
 from src.infra import selectors
 from src.infra.cancel_token import CancelToken, CancelledError
@@ -22,18 +28,499 @@ from src.infra.logger import HTML_DIR, ensure_log_dirs, make_debug_artifact_path
 
 logger = logging.getLogger(__name__)
 
-try:
-    from playwright.async_api import (
-        Error as PlaywrightError,
-        Page,
-        TimeoutError as PlaywrightTimeoutError,
-        async_playwright,
-    )
-except Exception:  # pragma: no cover - ambiente sem playwright
-    PlaywrightError = Exception  # type: ignore[assignment]
-    PlaywrightTimeoutError = Exception  # type: ignore[assignment]
-    Page = Any  # type: ignore[assignment,misc]
-    async_playwright = None  # type: ignore[assignment]
+# Chave de ordenação final das turmas (extração em C, sem lambda por comparação).
+_TURMA_SORT_KEY = operator.attrgetter("disciplina_codigo", "disciplina_nome", "turma_codigo")
+
+# Ordem padrao dos extratores de pagina. O parser por HTML (frame.content + regex leve) tem
+# se mostrado mais estavel no portal legacy da UTFPR; depois JS especifico e tabela generica.
+_PAGE_EXTRACT_ORDER = ("utfpr_html", "utfpr_js", "tables")
+
+# Regex do fallback por codigo-fonte HTML (tabela legacy), compiladas uma unica vez.
+# O titulo usa classes explicitas em vez de re.IGNORECASE para preservar o nome como veio.
+_DISCIPLINA_TITLE_RE = re.compile(r"^([A-Za-z]{2,}\d+[A-Za-z0-9]*)\s*[-\u2013]\s*(.+)$")
+# Assets estaticos e rastreadores abortados direto pelo padrao da rota; o restante do trafego
+# nao passa por Python.
+_BLOCKED_ASSET_RE = re.compile(
+    r"\.(?:png|jpe?g|gif|webp|svg|ico|bmp|woff2?|ttf|otf|eot|mp4|webm|mp3|ogg)(?:[?#]|$)"
+    r"|^https?://[^/]*(?:google-analytics\.com|googletagmanager\.com|doubleclick\.net"
+    r"|hotjar\.com|facebook\.net)(?:[:/]|$)",
+    re.I,
+)
+# Origem do sistema academico: imagens/fontes servidas sem extensao (ex.: foto por handler) nao
+# casam com o padrao acima e sao barradas pelo `resource_type`, so nesta origem.
+_PORTAL_ORIGIN_RE = re.compile(
+    "^" + re.escape(selectors.PORTAL_ENTRY_URL.rstrip("/")) + r"(?:[/?#]|$)"
+)
+# Candidato a "proxima pagina": visivel e sem marca de desabilitado (classe ou aria-disabled).
+# checkVisibility (Chromium) evita montar o estilo computado inteiro; getComputedStyle fica de
+# fallback.
+_JS_IS_CLICKABLE_NEXT = """
+(el) => {
+  const r = el.getBoundingClientRect();
+  if (!r.width || !r.height) return false;
+  if (el.checkVisibility) {
+    if (!el.checkVisibility({ checkVisibilityCSS: true })) return false;
+  } else {
+    const st = window.getComputedStyle(el);
+    if (st.visibility === "hidden" || st.display === "none") return false;
+  }
+  const cls = String(el.className || "").toLowerCase();
+  const dis = String(el.getAttribute("aria-disabled") || "").toLowerCase();
+  return !(cls.includes("disabled") || dis === "true" || dis === "1");
+}
+"""
+# Sonda + clique do "proximo" numa unica chamada (ver _click_next_page).
+# Texto da primeira linha de dados da tabela de turmas, usado para notar a troca de pagina. So
+# linhas de dados: um `tbody tr` qualquer pode ser de layout e nunca mudar. `td.sl` e a celula da
+# turma no markup legacy; sem ela, a primeira linha de uma tabela com `thead`.
+_JS_FIRST_DATA_ROW_TEXT = """
+(
+  document.querySelector(MAIN_TABLE + " td.sl")?.parentElement
+  ?? document.querySelector("table > thead ~ tbody > tr")
+)?.textContent ?? null
+""".strip().replace("MAIN_TABLE", json.dumps(selectors.UTFPR_TURMAS_MAIN_TABLE_SELECTOR))
+_JS_NEXT_PAGE_PROBE = """
+(sels) => {
+  const prevFirstRow = FIRST_DATA_ROW_TEXT;
+  const unsupported = [];
+  for (const css of sels) {
+    let el = null;
+    try { el = document.querySelector(css); } catch (_) { unsupported.push(css); continue; }
+    if (!el || !isClickableNext(el)) continue;
+    el.click();
+    return { clicked: css, prevFirstRow, unsupported };
+  }
+  return { clicked: null, prevFirstRow, unsupported };
+}
+""".replace("isClickableNext", "(" + _JS_IS_CLICKABLE_NEXT + ")").replace(
+    "FIRST_DATA_ROW_TEXT", _JS_FIRST_DATA_ROW_TEXT
+)
+# Extratores da tabela de turmas. Eles e as sondas abaixo sao instalados uma vez por contexto
+# (init script, vale para todos os frames) em `window.__gradeHelpers`, evitando reenviar e
+# recompilar o fonte a cada chamada.
+_JS_EXTRACT_TABLES = """
+() => {
+  // `textContent` nao forca layout (ao contrario de `innerText`); `clean` ja normaliza espacos.
+  // Contrato: `headers`, `rows` e `context_texts` so tem strings (tudo passa por `clean`).
+  const WS = /\\s+/g;
+  const NBSP = /\\u00a0/g;
+  const clean = (s) => (s || "").replace(NBSP, " ").replace(WS, " ").trim();
+  const collectContext = (table) => {
+    const texts = [];
+    if (table.caption) texts.push(clean(table.caption.textContent));
+    let node = table.previousElementSibling;
+    let hops = 0;
+    while (node && hops < 6) {
+      const skip = node.tagName === "SCRIPT" || node.tagName === "STYLE";
+      const txt = skip ? "" : clean(node.textContent);
+      if (txt) texts.push(txt);
+      node = node.previousElementSibling;
+      hops++;
+    }
+    return texts;
+  };
+  const tables = Array.from(document.querySelectorAll("table"));
+  return tables.map((table, idx) => {
+    let headers = Array.from(table.querySelectorAll("thead th")).map(th => clean(th.textContent));
+    if (!headers.length) {
+      const headRow = table.querySelector("tr");
+      if (headRow) {
+        headers = Array.from(headRow.children).map(el => clean(el.textContent));
+      }
+    }
+    // Celulas pelos filhos diretos da linha: sem motor de seletor por linha (e sem os `td` de
+    // tabelas aninhadas, que `querySelectorAll` tambem pegaria).
+    const rows = [];
+    for (const tr of table.querySelectorAll("tbody tr")) {
+      const row = [];
+      for (const c of tr.children) if (c.tagName === "TD") row.push(clean(c.textContent));
+      if (row.some(Boolean)) rows.push(row);
+    }
+    return {
+      index: idx,
+      headers,
+      rows,
+      context_texts: collectContext(table),
+    };
+  }).filter(t => t.rows.length > 0);
+}
+"""
+_JS_EXTRACT_UTFPR_ROWS = """
+() => {
+  const WS = /\\s+/g;
+  const NBSP = /\\u00a0/g;
+  const clean = (s) => (s || "").replace(NBSP, " ").replace(WS, " ").trim();
+  // Uma RegExp por classe, compilada na primeira consulta (antes era uma por celula).
+  const classRe = {};
+  const hasClass = (value, cls) =>
+    (classRe[cls] ||= new RegExp("(^|\\\\s)" + cls + "(\\\\s|$)", "i")).test(String(value || ""));
+  const TITLE_RE = /^([A-Za-z]{2,}\\d+[A-Za-z0-9]*)\\s*[-–]\\s*(.+)$/;
+  const HEADER_RE = /hor[aá]rio \\(dia\\/turno\\/aula\\)/i;
+  const CODE_RE = /^[A-Za-z0-9]+$/;
+
+  // Procura no documento atual e nos iframes de mesma origem numa unica passada;
+  // iframes cross-origin lancam excecao e ficam para `_find_frame_with_table`.
+  const docs = [document];
+  for (let i = 0; i < window.frames.length; i++) {
+    try {
+      const d = window.frames[i].document;
+      if (d) docs.push(d);
+    } catch (_) {}
+  }
+  let rootTable = null;
+  for (const d of docs) {
+    rootTable =
+      d.querySelector("table[border='1']") ||
+      Array.from(d.querySelectorAll("table")).find(
+        (t) => t.querySelector("td.t") && t.querySelector("td.sl, td.sc, td.sr")
+      );
+    if (rootTable) break;
+  }
+
+  if (!rootTable) return [];
+
+  let currentDisciplinaCodigo = "";
+  let currentDisciplinaNome = "";
+  const out = [];
+
+  const rowList = rootTable.rows ? Array.from(rootTable.rows) : Array.from(rootTable.querySelectorAll("tr"));
+
+  for (const tr of rowList) {
+    const trCells = tr.cells ? Array.from(tr.cells) : Array.from(tr.querySelectorAll("td"));
+    if (!trCells.length) continue;
+
+    let titleCell = null;
+    for (const td of trCells) {
+      if (hasClass(td.className, "t")) {
+        titleCell = td;
+        break;
+      }
+    }
+    if (titleCell) {
+      const titleNode = titleCell.querySelector("b") || titleCell;
+      const rawTitle = clean(titleNode.textContent || "");
+      const m = rawTitle.match(TITLE_RE);
+      if (m) {
+        currentDisciplinaCodigo = clean(m[1]).toUpperCase();
+        currentDisciplinaNome = clean(m[2]);
+      }
+      continue;
+    }
+
+    const cells = trCells
+      .filter((td) => !hasClass(td.className, "dn"))
+      .map((td) => ({
+        // `innerText` força layout e pode ficar muito lento nessa tabela gigante.
+        text: clean(td.textContent || ""),
+        cls: String(td.className || "").toLowerCase(),
+      }));
+    if (!cells.length) continue;
+
+    // Classe da primeira celula antes do texto: linhas que nao sao de dados saem sem montar nada.
+    const firstCls = cells[0].cls;
+    if (!hasClass(firstCls, "sl") && !hasClass(firstCls, "sc") && !hasClass(firstCls, "sr")) {
+      continue;
+    }
+    // Cabecalho repetido: testa celula a celula, sem juntar/baixar a linha inteira numa string.
+    if (cells.some((c) => HEADER_RE.test(c.text))) continue;
+
+    const get = (i) => clean((cells[i] && cells[i].text) || "");
+    const turmaCodigo = get(0);
+    if (!turmaCodigo || !CODE_RE.test(turmaCodigo)) continue;
+
+    out.push({
+      disciplina_codigo: currentDisciplinaCodigo,
+      disciplina_nome: currentDisciplinaNome,
+      turma_codigo: turmaCodigo,
+      enquadramento: get(1),
+      vagas_total: get(2),
+      vagas_calouros: get(3),
+      reserva: get(4),
+      prioridade: get(5),
+      horario_raw: get(6),
+      professor: get(7),
+      optativa: get(8),
+    });
+  }
+
+  return out;
+}
+"""
+# Legacy primeiro e, sem linhas, a tabela generica no mesmo evaluate (um round-trip por pagina).
+_JS_EXTRACT_ANY = (
+    "() => {\n"
+    f"  const rows = ({_JS_EXTRACT_UTFPR_ROWS.strip()})();\n"
+    "  if (rows.length) return { kind: 'utfpr', rows };\n"
+    f"  return {{ kind: 'generic', tables: ({_JS_EXTRACT_TABLES.strip()})() }};\n"
+    "}"
+)
+_JS_TURMAS_DOC_CHECK = """
+(doc, re) => {
+  if (doc.querySelector("table td.t, table[border='1']")) return true;
+  return re.test((doc.body && (doc.body.innerText || doc.body.textContent)) || "");
+}
+""".strip()
+_JS_LOOKS_LIKE_TURMAS = f'(pattern) => ({_JS_TURMAS_DOC_CHECK})(document, new RegExp(pattern, "i"))'
+# Mesma checagem na pagina e nos frames de mesma origem; `blocked` indica frame inacessivel
+# (cross-origin).
+_JS_LOOKS_LIKE_TURMAS_ANYWHERE = (
+    "(pattern) => {\n"
+    f"  const check = {_JS_TURMAS_DOC_CHECK};\n"
+    """  const re = new RegExp(pattern, "i");
+  let blocked = false;
+  const visit = (doc, depth) => {
+    if (check(doc, re)) return true;
+    if (depth >= 4) return false;
+    for (const f of doc.querySelectorAll("iframe, frame")) {
+      let inner = null;
+      try { inner = f.contentDocument; } catch (e) { inner = null; }
+      if (!inner) { blocked = true; continue; }
+      if (visit(inner, depth + 1)) return true;
+    }
+    return false;
+  };
+  return { found: visit(document, 0), blocked };
+}"""
+)
+_JS_IS_FILTER_SCREEN = """
+() => {
+  const hasCourseSelect = !!document.querySelector("select#p_curscodnr, select[name='p_curscodnr']");
+  const hasCampusSelect = !!document.querySelector("select#p_unidcodnr, select[name='p_unidcodnr']");
+  const hasInnerListFrame = !!document.querySelector("iframe#if_listahorario, iframe[name='if_listahorario']");
+  const bodyText = ((document.body && (document.body.innerText || document.body.textContent)) || "")
+    .replace(/\\s+/g, " ")
+    .toLowerCase();
+  return (hasCourseSelect || hasCampusSelect) && (
+    hasInnerListFrame || bodyText.includes("relação de turmas abertas para a matrícula") || bodyText.includes("relacao de turmas abertas para a matricula")
+  );
+}
+"""
+_JS_HAS_REAL_TABLE = """
+() => {
+  const hasCourseSelect = !!document.querySelector("select#p_curscodnr, select[name='p_curscodnr']");
+  const hasInnerListFrame = !!document.querySelector("iframe#if_listahorario, iframe[name='if_listahorario']");
+  const legacyTitle = !!document.querySelector("table td.t");
+  const dataCells = document.querySelectorAll("table td.sl, table td.sc, table td.sr").length;
+  const headerBlob = ((document.body && (document.body.innerText || document.body.textContent)) || "")
+    .replace(/\\s+/g, " ")
+    .toLowerCase();
+
+  // Tela intermediaria de filtro: nao considerar como tabela final.
+  if (hasCourseSelect || hasInnerListFrame) {
+    // Se a pagina/iframe atual ainda exibe o filtro, ela nao e a tabela final.
+    if (hasInnerListFrame || headerBlob.includes("confirmar>>")) return false;
+  }
+
+  if (legacyTitle) return true;
+  // Fallback generico: muitas celulas de dados sem o filtro de curso.
+  if (!hasCourseSelect && dataCells >= 12) return true;
+  return false;
+}
+"""
+# Ancora visivel + linhas de dados numa unica espera (antes eram wait_for_selector e
+# wait_for_function).
+_JS_TABLE_READY = (
+    "(anchor) => {\n"
+    "  const t = document.querySelector(anchor);\n"
+    "  if (!t) return false;\n"
+    "  const r = t.getBoundingClientRect();\n"
+    "  if (!r.width || !r.height) return false;\n"
+    "  if (window.getComputedStyle(t).visibility === 'hidden') return false;\n"
+    f"  return ({selectors.TURMAS_ROWS_FUNCTION})();\n"
+    "}"
+)
+# Classifica a pagina pelo texto do body sem trafega-lo: devolve um bitmask (_BODY_*).
+_JS_CLASSIFY_BODY = """
+(kw) => {
+  const text = ((document.body && document.body.textContent) || "").toLowerCase();
+  const any = (list) => (list || []).some((k) => k && text.includes(k));
+  let bits = 0;
+  if ((kw.campus || []).filter((k) => k && text.includes(k)).length >= 3) bits |= 1;
+  if (any(kw.portal)) bits |= 2;
+  if (any(kw.shell)) bits |= 4;
+  return bits;
+}
+"""
+_BODY_CAMPUS = 1
+_BODY_PORTAL_ALUNO = 2
+_BODY_HOME_SHELL = 4
+# Argumentos fixos das sondas, convertidos de selectors uma unica vez (nao a cada chamada).
+_CONFIRM_BUTTON_TEXTS = list(selectors.CONFIRM_BUTTON_TEXTS)
+_CONFIRM_BUTTON_SELECTORS = list(selectors.CONFIRM_BUTTON_SELECTORS)
+_DISCIPLINA_HEADER_SELECTORS = list(selectors.DISCIPLINA_HEADER_SELECTORS)
+# Texto do primeiro elemento de cada seletor (ou null), todos numa unica chamada.
+_JS_FIRST_TEXTS = """
+(sels) => sels.map((css) => {
+  try { return document.querySelector(css)?.textContent ?? null; } catch (_) { return null; }
+})
+"""
+# Clica o primeiro alvo visivel de uma lista de seletores, na ordem, numa unica chamada.
+# `css:has-text("x")` (so do Playwright) vira seletor CSS + filtro por texto (sem caixa).
+_JS_CLICK_FIRST_VISIBLE = """
+(sels) => {
+  const HAS_TEXT = /^(.*):has-text\\((["'])(.*)\\2\\)$/;
+  const norm = (s) => (s || "").replace(/\\s+/g, " ").trim().toLowerCase();
+  const visible = (el) => {
+    const r = el.getBoundingClientRect();
+    if (!r.width || !r.height) return false;
+    if (el.checkVisibility) return el.checkVisibility({ checkVisibilityCSS: true });
+    const st = window.getComputedStyle(el);
+    return st.visibility !== "hidden" && st.display !== "none";
+  };
+  for (const raw of sels) {
+    const m = raw.match(HAS_TEXT);
+    const text = m ? norm(m[3]) : "";
+    let nodes = [];
+    try { nodes = document.querySelectorAll(m ? m[1] : raw); } catch (_) { continue; }
+    for (const el of nodes) {
+      if (text && !norm(el.textContent).includes(text)) continue;
+      if (!visible(el)) continue;
+      el.click();
+      return true;
+    }
+  }
+  return false;
+}
+"""
+_PAGINATION_NEXT_SELECTORS = list(selectors.PAGINATION_NEXT_SELECTORS)
+_BODY_KEYWORD_SETS = {
+    "campus": [k.lower() for k in selectors.CAMPUS_PAGE_CITY_KEYWORDS],
+    "portal": [k.lower() for k in selectors.PORTAL_ALUNO_KEYWORDS],
+    "shell": [k.lower() for k in selectors.PORTAL_HOME_SHELL_KEYWORDS],
+}
+# Superficie inicial (login/portal/campus) numa unica chamada: seletores + bitmask do texto.
+_JS_PROBE_SURFACE = (
+    "(args) => {\n"
+    "  const has = (sel) => {\n"
+    "    try { return !!document.querySelector(sel); } catch (e) { return false; }\n"
+    "  };\n"
+    f"  const classify = {_JS_CLASSIFY_BODY.strip()};\n"
+    "  return {\n"
+    "    loginFields: has(args.user) && has(args.pwd),\n"
+    "    portalMarker: has(args.iframe) || has(args.menu),\n"
+    "    bodyBits: classify(args.kw),\n"
+    "  };\n"
+    "}"
+)
+_SURFACE_PROBE_ARGS = {
+    "user": selectors.SELECTOR_USERNAME,
+    "pwd": selectors.SELECTOR_PASSWORD,
+    "iframe": selectors.PORTAL_IFRAME_SELECTOR,
+    "menu": selectors.PORTAL_MENU_CONTAINER_SELECTOR,
+    "kw": _BODY_KEYWORD_SETS,
+}
+# Clique por texto na ordem dos locators (link, botao, texto) numa unica chamada; devolve a via
+# ou false.
+_JS_CLICK_BY_TEXT = """
+(text) => {
+  const norm = (s) => (s || "").replace(/\\s+/g, " ").trim().toLowerCase();
+  const target = norm(text);
+  if (!target) return false;
+  const visible = (el) => el.getClientRects().length > 0;
+  const tiers = [
+    ["link", "a[href], [role='link']"],
+    ["button", "button, input[type='button'], input[type='submit'], [role='button']"],
+  ];
+  for (const [via, sel] of tiers) {
+    for (const el of document.querySelectorAll(sel)) {
+      if (visible(el) && norm(el.innerText || el.value || el.textContent).includes(target)) {
+        el.click();
+        return via;
+      }
+    }
+  }
+  // Texto solto: o menor elemento que contem o alvo (evita clicar no container de tudo).
+  let best = null;
+  let bestLen = Infinity;
+  for (const el of document.querySelectorAll("a, button, label, li, span, div, td")) {
+    const txt = norm(el.textContent);
+    if (txt.length < bestLen && txt.includes(target) && visible(el)) {
+      best = el;
+      bestLen = txt.length;
+    }
+  }
+  if (!best) return false;
+  (best.closest("a,button,[onclick]") || best).click();
+  return "text";
+}
+"""
+# Predicado de wait_for_function: alguma superficie conhecida (login/portal/campus/inicio) ja
+# esta na tela.
+_JS_SURFACE_KNOWN = (
+    "(args) => {\n"
+    f"  const r = ({_JS_PROBE_SURFACE})(args);\n"
+    "  return r.loginFields || r.portalMarker || r.bodyBits !== 0;\n"
+    "}"
+)
+# Predicado de wait_for_function: a pagina saiu da superficie `args.origin`
+# ("campus"/"shell"/"login").
+_JS_SURFACE_ADVANCED = """
+(args) => {
+  if (document.readyState === "loading" || !document.body) return false;
+  const has = (sel) => {
+    try { return !!document.querySelector(sel); } catch (e) { return false; }
+  };
+  if (has(args.iframe) || has(args.menu)) return true;
+  if (args.origin === "login") return !has(args.pwd);
+  if (has(args.user) && has(args.pwd)) return true;
+  const text = (document.body.textContent || "").toLowerCase();
+  if (args.origin === "shell") return !(args.kw.shell || []).some((k) => k && text.includes(k));
+  return (args.kw.campus || []).filter((k) => k && text.includes(k)).length < 3;
+}
+"""
+_JS_HELPERS_GLOBAL = "__gradeHelpers"
+_JS_HELPERS_INIT = (
+    f"window.{_JS_HELPERS_GLOBAL} = {{\n"
+    f"  tables: {_JS_EXTRACT_TABLES.strip()},\n"
+    f"  utfprRows: {_JS_EXTRACT_UTFPR_ROWS.strip()},\n"
+    f"  extractAny: {_JS_EXTRACT_ANY},\n"
+    f"  looksLikeTurmas: {_JS_LOOKS_LIKE_TURMAS},\n"
+    f"  looksLikeTurmasAnywhere: {_JS_LOOKS_LIKE_TURMAS_ANYWHERE},\n"
+    f"  isFilterScreen: {_JS_IS_FILTER_SCREEN.strip()},\n"
+    f"  hasRealTable: {_JS_HAS_REAL_TABLE.strip()},\n"
+    f"  probeSurface: {_JS_PROBE_SURFACE},\n"
+    f"  clickByText: {_JS_CLICK_BY_TEXT.strip()},\n"
+    "};"
+)
+_HTML_MAIN_TABLE_RE = re.compile(
+    r"(?is)<table\b[^>]*border\s*=\s*['\"]?1['\"]?[^>]*>(?P<body>.*?)</table>"
+)
+_HTML_TR_RE = re.compile(r"(?is)<tr\b[^>]*>(?P<body>.*?)</tr>")
+_HTML_TITLE_TD_RE = re.compile(
+    r"(?is)<td\b[^>]*class\s*=\s*['\"][^'\"]*\bt\b[^'\"]*['\"][^>]*>(?P<td>.*?)</td>"
+)
+_HTML_B_RE = re.compile(r"(?is)<b\b[^>]*>(?P<t>.*?)</b>")
+_HTML_TD_RE = re.compile(r"(?is)<td\b(?P<attrs>[^>]*)>(?P<td>.*?)</td>")
+_HTML_CLASS_ATTR_RE = re.compile(r'(?is)\bclass\s*=\s*["\']([^"\']*)')
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+else:
+    Page = Any
+
+
+class _PlaywrightNotLoaded(Exception):
+    """Marcador usado nos `except` ate `_load_playwright()` rodar; nunca e lancado."""
+
+
+# Playwright e importado sob demanda (no `start()`), nao no import do modulo: testes, UI e
+# demais caminhos que nao fazem scraping nao pagam esse custo.
+PlaywrightError: type[Exception] = _PlaywrightNotLoaded
+PlaywrightTimeoutError: type[Exception] = _PlaywrightNotLoaded
+async_playwright = None
+
+
+def _load_playwright() -> bool:
+    global PlaywrightError, PlaywrightTimeoutError, async_playwright
+    if async_playwright is not None:
+        return True
+    try:
+        from playwright.async_api import Error, TimeoutError
+        from playwright.async_api import async_playwright as factory
+    except Exception:  # pragma: no cover - ambiente sem playwright
+        return False
+    PlaywrightError, PlaywrightTimeoutError, async_playwright = Error, TimeoutError, factory
+    return True
 
 try:  # pragma: no cover - opcional em runtime
     from rapidfuzz import fuzz as rf_fuzz
@@ -43,14 +530,76 @@ except Exception:  # pragma: no cover
     rf_process = None  # type: ignore[assignment]
 
 try:  # pragma: no cover - opcional em runtime
-    from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+    from tenacity import (
+        AsyncRetrying,
+        retry_if_exception_type,
+        retry_if_not_exception_type,
+        stop_after_attempt,
+        wait_exponential,
+    )
 except Exception:  # pragma: no cover
     AsyncRetrying = None  # type: ignore[assignment]
     retry_if_exception_type = None  # type: ignore[assignment]
+    retry_if_not_exception_type = None  # type: ignore[assignment]
     stop_after_attempt = None  # type: ignore[assignment]
     wait_exponential = None  # type: ignore[assignment]
 
 
+def _norm_text(text: str) -> str:
+    text = (text or "").lower()
+    # Texto ASCII (maioria das celulas) nao tem acento: pula NFKD e o filtro por caractere.
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    # split/join colapsa espacos mais rapido que re.sub no CPython.
+    return " ".join(text.split())
+
+
+@functools.lru_cache(maxsize=64)
+def _ci_pattern(text: str) -> re.Pattern[str]:
+    """Regex literal case-insensitive para `name=` de get_by_role.
+
+    Os textos vem de selectors e se repetem, entao o cache evita recompilar.
+    """
+    return re.compile(re.escape(text), re.IGNORECASE)
+
+
+# Todos os textos de "Turmas Abertas" numa regex: um locator por tipo (link/botao/texto) em vez de
+# um por texto, cada um pagando o timeout de popup quando falha.
+_TURMAS_TEXT_RE = re.compile(
+    "|".join(
+        r"\s+".join(re.escape(word) for word in t.split()) for t in selectors.TURMAS_ABERTAS_TEXTS
+    ),
+    re.IGNORECASE,
+)
+
+# Hints de coluna ja normalizados (feito uma vez no import, nao a cada tabela).
+_NORMALIZED_COLUMN_HINTS: dict[str, tuple[str, ...]] = {
+    field: tuple(_norm_text(h) for h in hints) for field, hints in selectors.COLUMN_HINTS.items()
+}
+# Todos os hints numa alternancia com um grupo nomeado por campo: uma varredura por cabecalho.
+_COLUMN_HINT_RE = re.compile(
+    "|".join(
+        f"(?P<{field}>{'|'.join(re.escape(h) for h in hints)})"
+        for field, hints in _NORMALIZED_COLUMN_HINTS.items()
+    )
+)
+
+
+@functools.lru_cache(maxsize=128)
+def _column_index_map_cached(headers: tuple[str, ...]) -> tuple[tuple[str, int], ...]:
+    """Mapeia campo -> indice da primeira coluna cujo cabecalho contem algum hint do campo.
+
+    Percorre os cabecalhos uma vez; paginas com o mesmo cabecalho reaproveitam o resultado.
+    """
+    mapping: dict[str, int] = {}
+    for idx, header in enumerate(headers):
+        # finditer (nao search): um cabecalho pode casar mais de um campo, ex. "vagas calouros".
+        for match in _COLUMN_HINT_RE.finditer(_norm_text(header)):
+            mapping.setdefault(match.lastgroup, idx)
+    return tuple(mapping.items())
+
+
 class PageLike(Protocol):
     url: str
 
@@ -78,6 +627,13 @@ class LoginResult:
     manual_step_required: bool = False
 
 
+@dataclass(slots=True, frozen=True)
+class _SurfaceProbe:
+    login_fields: bool = False
+    portal_marker: bool = False
+    body_bits: int = 0
+
+
 @dataclass(slots=True)
 class PortalCourseOption:
     value: str
@@ -147,6 +703,7 @@ class UtfprScraperAsync:
         self.page: Page | None = None
         self._event_loop: asyncio.AbstractEventLoop | None = None
         self._cancel_token: CancelToken | None = None
+        self._driver_task: asyncio.Task | None = None
         self._active_table_context: PageLike | None = None
         self._flow_state = PortalFlowState.INIT
         self._flow_started_monotonic = time.monotonic()
@@ -155,17 +712,32 @@ class UtfprScraperAsync:
         self._flow_transition_limit = 80
         self._session_recovery_attempts = 0
         self._flow_snapshot_counter = 0
+        self._frames_cache: tuple[float, Any, tuple[Any, ...]] | None = None
+        # URL do documento principal ja resolvida como Portal do Aluno; limpa a cada navegacao
+        # de qualquer frame.
+        self._portal_surface_url: str | None = None
+        self._cdp = None
+        self._cdp_page: Page | None = None
+        self._bg_tasks: set[asyncio.Task] = set()
+        self._last_state_fingerprint: int | None = None
+        self._pending_persist: asyncio.Task | None = None
+        self._closing: asyncio.Task | None = None
+        self._page_turn_kept_table = False
+        self._last_state_persist_monotonic = 0.0
 
     # ---------- Ciclo de vida ----------
     def bind_runtime(self, *, loop: asyncio.AbstractEventLoop, cancel_token: CancelToken) -> None:
         self._event_loop = loop
         self._cancel_token = cancel_token
+        # Chamado de dentro da coroutine que conduz o fluxo: ela e cancelada primeiro no
+        # cancelamento.
+        self._driver_task = asyncio.current_task(loop)
         cancel_token.register_cancel_callback(self.request_force_close_threadsafe)
 
     async def start(self) -> None:
         if self.page is not None:
             return
-        if async_playwright is None:
+        if not _load_playwright():
             raise ScraperError(
                 "Playwright nao disponivel. Instale com `pip install playwright` e `playwright install chromium`."
             )
@@ -175,27 +747,87 @@ class UtfprScraperAsync:
         if self.storage_state_path and self.storage_state_path.exists():
             context_kwargs["storage_state"] = str(self.storage_state_path)
         self._context = await self._browser.new_context(**context_kwargs)
-        await self._context.route("**/*", self._route_handler)
+        await self._context.route(_BLOCKED_ASSET_RE, self._route_handler)
+        await self._context.route(_PORTAL_ORIGIN_RE, self._portal_route_handler)
+        await self._context.add_init_script(_JS_HELPERS_INIT)
         self._context.set_default_timeout(self.timeout_ms)
         self.page = await self._context.new_page()
+        self.page.on("framenavigated", self._on_frame_navigated)
+        with contextlib.suppress(Exception):
+            # Sessao CDP direta para os scripts de extracao da pagina principal (somente Chromium).
+            self._cdp = await self._context.new_cdp_session(self.page)
+            self._cdp_page = self.page
         self._reset_flow_tracking()
         logger.info("Playwright async iniciado (headless=%s)", self.headless)
         await self._set_flow_state(PortalFlowState.INIT, step="start")
 
+    def _on_frame_navigated(self, frame: Any) -> None:
+        # Qualquer frame: o conteudo do portal vive em `iframe#if_navega`, nao so no documento.
+        self._portal_surface_url = None
+
     async def close(self) -> None:
+        # Chamadas simultaneas (force_close agendado pelo token e o finally do worker) esperam o
+        # mesmo fechamento em vez de fechar pagina/contexto/browser duas vezes.
+        if self._closing is None or self._closing.done():
+            self._closing = asyncio.ensure_future(self._close_resources())
+        await asyncio.shield(self._closing)
+
+    async def _close_resources(self) -> None:
         self._active_table_context = None
-        for attr in ("page", "_context", "_browser", "_pw"):
-            obj = getattr(self, attr, None)
-            if obj is None:
+        self._portal_surface_url = None
+        self._invalidate_frames_cache()
+        pending_persist, self._pending_persist = self._pending_persist, None
+        if pending_persist is not None:
+            if not pending_persist.done():
+                try:
+                    await asyncio.wait_for(asyncio.shield(pending_persist), timeout=3.0)
+                except Exception:
+                    logger.debug("Falha ao aguardar gravacao do storage state", exc_info=True)
+            elif not pending_persist.cancelled():
+                # Ja terminou: le o resultado para a excecao nao ficar pendente na task.
+                pending_persist.exception()
+        for task in list(self._bg_tasks):
+            task.cancel()
+        self._bg_tasks.clear()
+        cdp, self._cdp, self._cdp_page = self._cdp, None, None
+        if cdp is not None:
+            with contextlib.suppress(Exception):
+                await asyncio.wait_for(cdp.detach(), timeout=1.5)
+        # Pagina e contexto fecham juntos; depois browser e driver (cada etapa com teto de 1.5s).
+        for attrs in (("page", "_context"), ("_browser",), ("_pw",)):
+            targets = [
+                (attr, obj) for attr in attrs if (obj := getattr(self, attr, None)) is not None
+            ]
+            if not targets:
                 continue
-            try:
-                if attr == "_pw":
-                    await obj.stop()
-                else:
-                    await asyncio.wait_for(obj.close(), timeout=1.5)
-            except Exception:
-                logger.debug("Falha ao fechar %s", attr, exc_info=True)
-            setattr(self, attr, None)
+            results = await asyncio.gather(
+                *(
+                    obj.stop() if attr == "_pw" else asyncio.wait_for(obj.close(), timeout=1.5)
+                    for attr, obj in targets
+                ),
+                return_exceptions=True,
+            )
+            for (attr, _obj), result in zip(targets, results):
+                if isinstance(result, Exception):
+                    logger.debug("Falha ao fechar %s", attr, exc_info=result)
+                setattr(self, attr, None)
+
+    def _spawn_background(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
+        task.add_done_callback(self._log_background_failure)
+        return task
+
+    @staticmethod
+    def _log_background_failure(task: asyncio.Task) -> None:
+        # Ninguem faz await dessas tasks: sem ler a excecao aqui ela so apareceria como
+        # "Task exception was never retrieved" quando a task fosse coletada.
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            logger.warning("Tarefa em segundo plano falhou: %s", exc, exc_info=exc)
 
     async def force_close(self) -> None:
         """Fecha contexto/browser rapidamente (usado no cancelamento)."""
@@ -209,27 +841,146 @@ class UtfprScraperAsync:
         if loop is None or loop.is_closed():
             return
         try:
+            # Cancela a task condutora antes: o await pendente (goto/evaluate) levanta
+            # CancelledError na hora, em vez de esperar o fechamento em cascata do navegador.
+            task = self._driver_task
+            if task is not None and not task.done():
+                loop.call_soon_threadsafe(task.cancel)
             asyncio.run_coroutine_threadsafe(self.force_close(), loop)
         except Exception:
             logger.debug("Falha ao agendar force_close thread-safe", exc_info=True)
 
-    async def _route_handler(self, route, request) -> None:
-        # Acelera carregamento sem quebrar JS/layout (mantém scripts e CSS).
+    @staticmethod
+    async def _route_handler(route, request) -> None:
+        # So recebe imagem/fonte/midia e rastreadores (_BLOCKED_ASSET_RE). Scripts e CSS ficam
+        # fora da rota: a deteccao de visibilidade (td.dn, offsetParent) depende do CSS.
+        await route.abort()
+
+    @staticmethod
+    async def _portal_route_handler(route, request) -> None:
         if request.resource_type in {"image", "media", "font"}:
             await route.abort()
         else:
-            await route.continue_()
+            # Segue para a rota de assets (se casar) ou para a rede.
+            await route.fallback()
+
+    async def _wait_dom_settled(self, ctx: PageLike, *, max_ms: int = 200) -> None:
+        """Espera o evento `load` (ou `readyState === "complete"`) com teto de `max_ms`.
+
+        Substitui o sleep fixo apos `domcontentloaded`: se a pagina ja carregou, retorna na hora.
+        """
+        script = """
+        (maxMs) => new Promise((resolve) => {
+          if (document.readyState === "complete") return resolve(true);
+          window.addEventListener("load", () => resolve(true), { once: true });
+          setTimeout(() => resolve(false), maxMs);
+        })
+        """
+        with contextlib.suppress(Exception):
+            await asyncio.wait_for(ctx.evaluate(script, max_ms), timeout=(max_ms + 500) / 1000)
+
+    async def _evaluate_fast(self, ctx: PageLike, script: str, arg: Any | None = None) -> Any:
+        """Avalia `script` (funcao JS), via `Runtime.evaluate` se `ctx` e a pagina da sessao CDP.
+
+        Frames e paginas sem sessao CDP (popup, outros navegadores) usam `ctx.evaluate` normalmente.
+        So para scripts sem efeito colateral: se o envio pela sessao CDP falhar, o script roda de
+        novo pelo Playwright, e um clique poderia acontecer duas vezes.
+        """
+        cdp = self._cdp
+        if cdp is not None and ctx is self._cdp_page:
+            call_arg = "" if arg is None else json.dumps(arg)
+            try:
+                result = await cdp.send(
+                    "Runtime.evaluate",
+                    {
+                        "expression": f"({script})({call_arg})",
+                        "returnByValue": True,
+                        "awaitPromise": False,
+                    },
+                )
+            except Exception:
+                # Sessao desanexada/fechada: o script nao rodou; segue sem CDP daqui em diante.
+                logger.debug(
+                    "Sessao CDP indisponivel; usando evaluate do Playwright", exc_info=True
+                )
+                self._cdp = None
+                self._cdp_page = None
+            else:
+                details = result.get("exceptionDetails")
+                if details:
+                    message = (details.get("exception") or {}).get("description")
+                    raise ScraperError(
+                        f"Erro no script da pagina: {message or details.get('text')}"
+                    )
+                return (result.get("result") or {}).get("value")
+        if arg is None:
+            return await ctx.evaluate(script)
+        return await ctx.evaluate(script, arg)
 
     def _check_cancel(self, token: CancelToken | None) -> None:
         self._ensure_flow_guard()
         if token is not None:
             token.raise_if_cancelled()
 
+    @contextlib.contextmanager
+    def _cancel_current_task_on(self, token: CancelToken | None) -> Iterator[None]:
+        """Cancela a task atual assim que `token` for acionado (de qualquer thread).
+
+        Complementa os `_check_cancel` pontuais: um await longo (goto, wait_for) e interrompido
+        na hora em vez de so no proximo ponto de verificacao. Deve envolver apenas awaits, nunca
+        um `yield` de gerador (ali quem roda e o codigo do consumidor).
+        """
+        task = asyncio.current_task()
+        if token is None or task is None:
+            yield
+            return
+        if task is self._driver_task and token is self._cancel_token:
+            # `request_force_close_threadsafe` ja cancela a task condutora neste token.
+            yield
+            return
+        loop = asyncio.get_running_loop()
+        armed = True
+
+        def _cancel_if_armed() -> None:
+            if armed:
+                task.cancel()
+
+        def _on_cancel() -> None:
+            loop.call_soon_threadsafe(_cancel_if_armed)
+
+        token.register_cancel_callback(_on_cancel)
+        try:
+            yield
+        except asyncio.CancelledError:
+            if token.is_cancelled():
+                task.uncancel()
+                raise CancelledError("Operacao cancelada pelo usuario") from None
+            raise
+        finally:
+            armed = False
+            token.unregister_cancel_callback(_on_cancel)
+
     def _ensure_page(self) -> Page:
         if self.page is None:
             raise ScraperError("Pagina Playwright nao iniciada.")
         return self.page
 
+    def _cached_frames(self, page: Page, *, ttl: float = 0.5) -> tuple[Any, ...]:
+        """Snapshot de `page.frames` reaproveitado por uma janela curta.
+
+        Evita reler a lista de frames varias vezes dentro da mesma operacao de navegacao.
+        """
+        now = time.monotonic()
+        cached = self._frames_cache
+        if cached is not None and cached[1] is page and (now - cached[0]) < ttl:
+            return cached[2]
+        frames = tuple(page.frames)
+        self._frames_cache = (now, page, frames)
+        return frames
+
+    def _invalidate_frames_cache(self) -> None:
+        self._frames_cache = None
+
     def _reset_flow_tracking(self) -> None:
         self._flow_state = PortalFlowState.INIT
         self._flow_started_monotonic = time.monotonic()
@@ -287,6 +1038,7 @@ class UtfprScraperAsync:
         page: Page | None = None,
     ) -> None:
         state_changed = state != self._flow_state
+        self._invalidate_frames_cache()
         if state != self._flow_state:
             self._flow_transition_count += 1
             self._flow_state = state
@@ -300,10 +1052,24 @@ class UtfprScraperAsync:
         page = self.page
         png_path, html_path = make_debug_artifact_paths(prefix)
         if page is not None:
-            with contextlib.suppress(Exception):
-                await page.screenshot(path=str(png_path), full_page=True)
-            with contextlib.suppress(Exception):
-                html_path.write_text(await page.content(), encoding="utf-8")
+            # HTML recortado no navegador: `content()` serializa o DOM inteiro (pode ter MBs) e
+            # atrasa justamente os caminhos de erro/cancelamento.
+            script = """
+            (cap) => {
+              const html = document.documentElement ? document.documentElement.outerHTML : "";
+              return html.length > cap ? html.slice(0, cap) + "\\n<!-- truncado -->" : html;
+            }
+            """
+            shot, html = await asyncio.gather(
+                page.screenshot(path=str(png_path), full_page=True),
+                page.evaluate(script, selectors.DEBUG_HTML_MAX_CHARS),
+                return_exceptions=True,
+            )
+            if isinstance(shot, Exception):
+                logger.debug("Falha no screenshot de debug", exc_info=shot)
+            if isinstance(html, str):
+                with contextlib.suppress(Exception):
+                    await asyncio.to_thread(html_path.write_text, html, encoding="utf-8")
         logger.warning("Artefatos de debug salvos: %s | %s", png_path, html_path)
         return png_path, html_path
 
@@ -351,18 +1117,30 @@ class UtfprScraperAsync:
         return saved
 
     # ---------- Helpers de retry ----------
+    @staticmethod
+    def _retry_backoff_ms(attempt: int) -> float:
+        """Backoff exponencial truncado com jitter (evita retries sincronizados sob carga)."""
+        raw = min(selectors.RETRY_MAX_MS, selectors.RETRY_BASE_MS * (2**attempt))
+        return raw * random.uniform(0.5, 1.5)
+
     async def _retry(self, op_name: str, coro_factory, *, token: CancelToken | None = None):
-        retry_errors = (PlaywrightTimeoutError, PlaywrightError, SelectorChangedError, ScraperError)
+        # Timeout/erro transitório do Playwright vale retry; portal com estrutura diferente
+        # (SelectorChangedError) não melhora tentando de novo, então falha rápido.
+        # asyncio.CancelledError (BaseException) nunca entra em retry_errors: sobe na hora.
+        retry_errors = (PlaywrightTimeoutError, PlaywrightError, ScraperError)
         if (
             AsyncRetrying is not None
             and stop_after_attempt is not None
-            and wait_exponential is not None
             and retry_if_exception_type is not None
+            and retry_if_not_exception_type is not None
         ):
             async for attempt in AsyncRetrying(
                 stop=stop_after_attempt(self.retries + 1),
-                wait=wait_exponential(multiplier=1, min=1, max=8),
-                retry=retry_if_exception_type(retry_errors),
+                wait=lambda state: self._retry_backoff_ms(state.attempt_number - 1) / 1000,
+                retry=(
+                    retry_if_exception_type(retry_errors)
+                    & retry_if_not_exception_type(SelectorChangedError)
+                ),
                 reraise=True,
             ):
                 self._check_cancel(token)
@@ -386,11 +1164,13 @@ class UtfprScraperAsync:
             await self._log_flow_event(step=f"retry:{op_name}", attempt=attempt + 1)
             try:
                 return await coro_factory()
+            except SelectorChangedError:
+                raise
             except retry_errors as exc:
                 last_exc = exc
                 if attempt >= self.retries:
                     break
-                backoff_ms = selectors.RETRY_BACKOFF_MS * (attempt + 1)
+                backoff_ms = self._retry_backoff_ms(attempt)
                 logger.warning("%s falhou (tentativa %d). Retry em %d ms: %s", op_name, attempt + 1, backoff_ms, exc)
                 await asyncio.sleep(backoff_ms / 1000)
         assert last_exc is not None
@@ -413,23 +1193,66 @@ class UtfprScraperAsync:
             page=page,
         )
 
-    async def _has_login_fields(self, page: Page) -> bool:
+    async def _probe_surface(self, page: Page) -> _SurfaceProbe:
+        """Campos de login, marcadores do portal e bitmask `_BODY_*` numa unica chamada JS."""
         with contextlib.suppress(Exception):
-            user = page.locator(selectors.SELECTOR_USERNAME).first
-            pwd = page.locator(selectors.SELECTOR_PASSWORD).first
-            if await user.count() and await pwd.count():
-                return True
+            raw = await self._run_page_helper(
+                page, "probeSurface", _JS_PROBE_SURFACE, _SURFACE_PROBE_ARGS
+            )
+            if isinstance(raw, dict):
+                return _SurfaceProbe(
+                    login_fields=bool(raw.get("loginFields")),
+                    portal_marker=bool(raw.get("portalMarker")),
+                    body_bits=int(raw.get("bodyBits") or 0),
+                )
+        return _SurfaceProbe()
+
+    async def _wait_surface_advanced(self, page: Page, origin: str, *, timeout_ms: int) -> bool:
+        """Espera a pagina sair da superficie `origin` ("campus"/"shell"/"login").
+
+        Substitui o sleep fixo: retorna assim que a proxima superficie aparece.
+        """
+        with contextlib.suppress(Exception):
+            await page.wait_for_function(
+                _JS_SURFACE_ADVANCED,
+                arg={**_SURFACE_PROBE_ARGS, "origin": origin},
+                timeout=timeout_ms,
+            )
+            return True
         return False
 
-    async def _looks_like_campus_selector_page(self, page: Page) -> bool:
-        try:
-            body = ((await page.text_content("body")) or "").lower()
-        except Exception:
-            return False
-        if await self._has_login_fields(page):
-            return False
-        hits = sum(1 for city in selectors.CAMPUS_PAGE_CITY_KEYWORDS if city.lower() in body)
-        return hits >= 3
+    async def _has_login_fields(self, page: Page, *, probe: _SurfaceProbe | None = None) -> bool:
+        if probe is None:
+            probe = await self._probe_surface(page)
+        return probe.login_fields
+
+    async def _looks_like_campus_selector_page(
+        self, page: Page, *, probe: _SurfaceProbe | None = None
+    ) -> bool:
+        if probe is None:
+            probe = await self._probe_surface(page)
+        return bool(probe.body_bits & _BODY_CAMPUS) and not probe.login_fields
+
+    async def _click_by_text_js(self, page: Page, text: str) -> str | None:
+        """Clica no primeiro link/botao visivel (ou menor elemento) com `text`; devolve a via."""
+        with contextlib.suppress(Exception):
+            via = await self._run_page_helper(
+                page, "clickByText", _JS_CLICK_BY_TEXT, text, side_effects=True
+            )
+            return str(via) if via else None
+        return None
+
+    async def _click_by_text_locators(self, page: Page, text: str) -> str | None:
+        timeout = selectors.PROBE_CLICK_TIMEOUT_MS
+        for kind in ("link", "button", "text"):
+            with contextlib.suppress(Exception):
+                if kind == "text":
+                    await page.get_by_text(text, exact=False).first.click(timeout=timeout)
+                else:
+                    locator = page.get_by_role(kind, name=_ci_pattern(text)).first
+                    await locator.click(timeout=timeout)
+                return kind
+        return None
 
     async def _select_default_campus_if_present(
         self,
@@ -444,71 +1267,23 @@ class UtfprScraperAsync:
         campus = self.default_campus_name or selectors.DEFAULT_CAMPUS_NAME
         logger.info("Pagina de campus detectada; selecionando campus padrao: %s", campus)
 
-        with contextlib.suppress(Exception):
-            await page.get_by_role("link", name=re.compile(re.escape(campus), re.IGNORECASE)).first.click()
-            with contextlib.suppress(Exception):
-                await page.wait_for_load_state("domcontentloaded", timeout=self.timeout_ms)
-            await asyncio.sleep(0.2)
-            await self._set_flow_state(
-                PortalFlowState.CAMPUS_SELECTED,
-                step="select_campus",
-                detail=f"Campus selecionado: {campus}",
-                page=page,
-            )
-            return True
-
-        with contextlib.suppress(Exception):
-            await page.get_by_role("button", name=re.compile(re.escape(campus), re.IGNORECASE)).first.click()
-            with contextlib.suppress(Exception):
-                await page.wait_for_load_state("domcontentloaded", timeout=self.timeout_ms)
-            await asyncio.sleep(0.2)
-            await self._set_flow_state(
-                PortalFlowState.CAMPUS_SELECTED,
-                step="select_campus",
-                detail=f"Campus selecionado: {campus}",
-                page=page,
+        # Um unico scan JS (link -> botao -> texto) resolve o caso comum; os locators do Playwright
+        # ficam de reserva, pois cada tentativa sem alvo espera o timeout padrao.
+        via = await self._click_by_text_js(page, campus)
+        if via is None:
+            via = await self._click_by_text_locators(page, campus)
+        if via is not None:
+            # Espera a proxima tela (login/portal) em vez do load state, que pode travar apos o
+            # clique.
+            advanced = await self._wait_surface_advanced(
+                page, "campus", timeout_ms=min(self.timeout_ms // 2, 4000)
             )
-            return True
-
-        with contextlib.suppress(Exception):
-            await page.get_by_text(campus, exact=False).first.click()
-            with contextlib.suppress(Exception):
-                await page.wait_for_load_state("domcontentloaded", timeout=self.timeout_ms)
-            await asyncio.sleep(0.2)
+            if not advanced:
+                await self._wait_dom_settled(page, max_ms=200)
             await self._set_flow_state(
                 PortalFlowState.CAMPUS_SELECTED,
                 step="select_campus",
-                detail=f"Campus selecionado: {campus}",
-                page=page,
-            )
-            return True
-
-        script = """
-        (campus) => {
-          const norm = (s) => (s || "").replace(/\\s+/g, " ").trim().toLowerCase();
-          const target = norm(campus);
-          const candidates = Array.from(document.querySelectorAll("a, button, label, span, div"));
-          for (const el of candidates) {
-            const txt = norm(el.innerText || el.textContent || "");
-            if (txt === target || txt.includes(target)) {
-              el.click();
-              return true;
-            }
-          }
-          return false;
-        }
-        """
-        clicked = False
-        with contextlib.suppress(Exception):
-            clicked = bool(await page.evaluate(script, campus))
-        if clicked:
-            with contextlib.suppress(Exception):
-                await page.wait_for_load_state("domcontentloaded", timeout=self.timeout_ms)
-            await asyncio.sleep(0.2)
-            await self._set_flow_state(
-                PortalFlowState.CAMPUS_SELECTED,
-                step="select_campus_js",
-                detail=f"Campus selecionado via JS: {campus}",
+                detail=f"Campus selecionado ({via}): {campus}",
                 page=page,
             )
             return True
@@ -518,89 +1293,51 @@ class UtfprScraperAsync:
             f"'{campus}'. Ajuste src/infra/selectors.py."
         )
 
-    async def _looks_like_portal_aluno_page(self, page: Page) -> bool:
-        with contextlib.suppress(Exception):
-            if await page.locator(selectors.PORTAL_IFRAME_SELECTOR).count():
-                return True
-        with contextlib.suppress(Exception):
-            if await page.locator(selectors.PORTAL_MENU_CONTAINER_SELECTOR).count():
-                return True
-        try:
-            body = ((await page.text_content("body")) or "").lower()
-        except Exception:
-            return False
-        return any(k in body for k in selectors.PORTAL_ALUNO_KEYWORDS)
+    async def _looks_like_portal_aluno_page(
+        self, page: Page, *, probe: _SurfaceProbe | None = None
+    ) -> bool:
+        if probe is None:
+            probe = await self._probe_surface(page)
+        return probe.portal_marker or bool(probe.body_bits & _BODY_PORTAL_ALUNO)
 
-    async def _looks_like_portal_home_shell_page(self, page: Page) -> bool:
-        if await self._has_login_fields(page):
-            return False
-        if await self._looks_like_portal_aluno_page(page):
-            return False
-        try:
-            body = ((await page.text_content("body")) or "").lower()
-        except Exception:
+    async def _looks_like_portal_home_shell_page(
+        self, page: Page, *, probe: _SurfaceProbe | None = None
+    ) -> bool:
+        if probe is None:
+            probe = await self._probe_surface(page)
+        if not probe.body_bits & _BODY_HOME_SHELL or probe.login_fields:
             return False
-        return any(k in body for k in selectors.PORTAL_HOME_SHELL_KEYWORDS)
+        return not await self._looks_like_portal_aluno_page(page, probe=probe)
 
     async def _click_portal_aluno_tab_if_present(self, page: Page, *, token: CancelToken | None = None) -> bool:
         self._check_cancel(token)
         tab_text = selectors.PORTAL_HOME_TAB_TEXT
 
-        with contextlib.suppress(Exception):
-            await page.get_by_role("link", name=re.compile(re.escape(tab_text), re.IGNORECASE)).first.click()
-            with contextlib.suppress(Exception):
-                await page.wait_for_load_state("domcontentloaded", timeout=min(self.timeout_ms, 4000))
-            await asyncio.sleep(0.35)
-            return True
-
-        with contextlib.suppress(Exception):
-            await page.get_by_role("button", name=re.compile(re.escape(tab_text), re.IGNORECASE)).first.click()
-            with contextlib.suppress(Exception):
-                await page.wait_for_load_state("domcontentloaded", timeout=min(self.timeout_ms, 4000))
-            await asyncio.sleep(0.35)
-            return True
-
-        with contextlib.suppress(Exception):
-            await page.get_by_text(tab_text, exact=False).first.click()
-            with contextlib.suppress(Exception):
-                await page.wait_for_load_state("domcontentloaded", timeout=min(self.timeout_ms, 4000))
-            await asyncio.sleep(0.35)
-            return True
+        via = await self._click_by_text_js(page, tab_text)
+        if via is None:
+            via = await self._click_by_text_locators(page, tab_text)
+        if via is None:
+            return False
+        advanced = await self._wait_surface_advanced(
+            page, "shell", timeout_ms=min(self.timeout_ms // 2, 4000)
+        )
+        if not advanced:
+            await self._wait_dom_settled(page, max_ms=350)
+        return True
 
+    async def _page_signature(self, page: Page) -> str:
+        # Titulo + inicio do body montados no navegador: uma ida e volta e so ~1200 chars
+        # trafegados.
         script = """
-        (tabText) => {
-          const norm = (s) => (s || '').replace(/\\s+/g, ' ').trim().toLowerCase();
-          const target = norm(tabText);
-          const nodes = Array.from(document.querySelectorAll('a, button, li, div, span'));
-          for (const el of nodes) {
-            const txt = norm(el.innerText || el.textContent || '');
-            if (txt !== target) continue;
-            const clickable = el.closest('a,button,[onclick],li,div');
-            (clickable || el).click();
-            return true;
-          }
-          return false;
+        () => {
+          const body = ((document.body && document.body.textContent) || "").slice(0, 1200);
+          const norm = (s) => s.replace(/\\s+/g, " ").trim().toLowerCase();
+          return norm(document.title || "") + "|" + norm(body);
         }
         """
         with contextlib.suppress(Exception):
-            if await page.evaluate(script, tab_text):
-                with contextlib.suppress(Exception):
-                    await page.wait_for_load_state("domcontentloaded", timeout=min(self.timeout_ms, 4000))
-                await asyncio.sleep(0.35)
-                return True
-        return False
-
-    async def _page_signature(self, page: Page) -> str:
-        try:
-            title = (await page.title()) or ""
-        except Exception:
-            title = ""
-        try:
-            body = ((await page.text_content("body")) or "")[:1200]
-        except Exception:
-            body = ""
-        normalized = " ".join(body.split()).lower()
-        return f"{title.strip().lower()}|{normalized}"
+            return str(await page.evaluate(script) or "|")
+        return "|"
 
     async def _ensure_login_surface_or_portal(
         self,
@@ -615,13 +1352,34 @@ class UtfprScraperAsync:
         - `login`: campos usuário/senha visíveis
         - `portal`: página "Portal do Aluno" detectada (sessão já ativa)
         """
+        # Portal ja detectado sem navegacao (de qualquer frame) desde entao: nada a resolver.
+        # So o "portal" e memorizado; "login" precisa ser reavaliado (o submit pode trocar o DOM
+        # sem navegar).
+        if self._portal_surface_url is not None and self._portal_surface_url == page.url:
+            await self._set_flow_state(
+                PortalFlowState.LOGGED_IN,
+                step="detect_portal_aluno",
+                detail="Portal do Aluno ja detectado neste documento",
+                page=page,
+            )
+            return "portal"
+
         campus_sig_counts: dict[str, int] = {}
         shell_sig_counts: dict[str, int] = {}
 
+        # Caminho comum (sessao salva ou login direto): espera a primeira superficie reconhecivel
+        # aparecer, para o primeiro passo ja decidir em vez de cair no fallback do LOGIN_URL.
+        with contextlib.suppress(Exception):
+            await page.wait_for_function(
+                _JS_SURFACE_KNOWN, arg=_SURFACE_PROBE_ARGS, timeout=min(self.timeout_ms, 2000)
+            )
+
         for _step in range(max_steps):
             self._check_cancel(token)
 
-            if await self._has_login_fields(page):
+            # Um unico probe por passo serve para todas as checagens abaixo.
+            probe = await self._probe_surface(page)
+            if await self._has_login_fields(page, probe=probe):
                 logger.info("Superfície de login detectada")
                 await self._set_flow_state(
                     PortalFlowState.LOGIN_PAGE,
@@ -631,7 +1389,7 @@ class UtfprScraperAsync:
                 )
                 return "login"
 
-            if await self._looks_like_portal_aluno_page(page):
+            if await self._looks_like_portal_aluno_page(page, probe=probe):
                 logger.info("Portal do Aluno detectado (sessão ativa ou pós-login)")
                 await self._set_flow_state(
                     PortalFlowState.LOGGED_IN,
@@ -639,9 +1397,10 @@ class UtfprScraperAsync:
                     detail="Portal do Aluno detectado",
                     page=page,
                 )
+                self._portal_surface_url = page.url
                 return "portal"
 
-            if await self._looks_like_portal_home_shell_page(page):
+            if await self._looks_like_portal_home_shell_page(page, probe=probe):
                 sig = await self._page_signature(page)
                 shell_sig_counts[sig] = shell_sig_counts.get(sig, 0) + 1
                 if shell_sig_counts[sig] > 3:
@@ -656,7 +1415,7 @@ class UtfprScraperAsync:
                     )
                 continue
 
-            if await self._looks_like_campus_selector_page(page):
+            if await self._looks_like_campus_selector_page(page, probe=probe):
                 sig = await self._page_signature(page)
                 campus_sig_counts[sig] = campus_sig_counts.get(sig, 0) + 1
                 if campus_sig_counts[sig] > 3:
@@ -665,17 +1424,18 @@ class UtfprScraperAsync:
                         "repetidamente sem avancar para login/portal."
                     )
                 await self._select_default_campus_if_present(page, token=token)
-                with contextlib.suppress(Exception):
-                    await page.wait_for_load_state("domcontentloaded", timeout=min(self.timeout_ms, 3500))
-                await asyncio.sleep(0.35)
                 continue
 
             # Fallback: em alguns cenários o login está em /login e a entrada redireciona tarde.
             with contextlib.suppress(Exception):
-                await page.goto(selectors.LOGIN_URL, wait_until="domcontentloaded", timeout=min(self.timeout_ms, 4500))
+                await page.goto(
+                    selectors.LOGIN_URL, wait_until="commit", timeout=min(self.timeout_ms, 4500)
+                )
             with contextlib.suppress(Exception):
-                await page.wait_for_load_state("domcontentloaded", timeout=min(self.timeout_ms, 2000))
-            await asyncio.sleep(0.2)
+                await page.wait_for_load_state(
+                    "domcontentloaded", timeout=min(self.timeout_ms, 4500)
+                )
+            await self._wait_dom_settled(page, max_ms=200)
 
         raise SelectorChangedError(
             "Nao foi possivel resolver a etapa inicial (cidade/login/portal). "
@@ -690,6 +1450,49 @@ class UtfprScraperAsync:
         fallback_labels: tuple[str, ...],
         value: str,
     ) -> None:
+        # Caminho rapido: CSS e labels resolvidos numa unica chamada JS, sem o wait de 2.5s
+        # por seletor quando o CSS do portal muda mas o label continua.
+        script = """
+        ({ css, labels, val }) => {
+          const visible = (el) => {
+            if (!el) return false;
+            const r = el.getBoundingClientRect();
+            if (!r.width || !r.height) return false;
+            if (el.checkVisibility) return el.checkVisibility({ checkVisibilityCSS: true });
+            const st = window.getComputedStyle(el);
+            return st.visibility !== "hidden" && st.display !== "none";
+          };
+          const norm = (s) => String(s || "").replace(/\\s+/g, " ").trim().toLowerCase();
+          let el = null;
+          try {
+            el = Array.from(document.querySelectorAll(css)).find(visible) || null;
+          } catch (_) {}
+          if (!el) {
+            const allLabels = Array.from(document.querySelectorAll("label"));
+            for (const wanted of labels.map(norm)) {
+              const label = allLabels.find((l) => norm(l.textContent).includes(wanted));
+              const byFor = label && label.htmlFor && document.getElementById(label.htmlFor);
+              const control = label && (label.control || byFor);
+              if (visible(control)) {
+                el = control;
+                break;
+              }
+            }
+          }
+          if (!el) return false;
+          el.focus();
+          const setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), "value")?.set;
+          if (setter) setter.call(el, val);
+          else el.value = val;
+          el.dispatchEvent(new Event("input", { bubbles: true }));
+          el.dispatchEvent(new Event("change", { bubbles: true }));
+          return true;
+        }
+        """
+        with contextlib.suppress(Exception):
+            args = {"css": css, "labels": list(fallback_labels), "val": value}
+            if await page.evaluate(script, args):
+                return
         try:
             locator = page.locator(css).first
             await locator.wait_for(state="visible", timeout=2500)
@@ -699,36 +1502,74 @@ class UtfprScraperAsync:
             logger.debug("Falha em CSS '%s'; tentando fallback por label", css, exc_info=True)
         for label in fallback_labels:
             with contextlib.suppress(Exception):
-                await page.get_by_label(label, exact=False).fill(value)
+                await page.get_by_label(label, exact=False).fill(
+                    value, timeout=selectors.PROBE_CLICK_TIMEOUT_MS
+                )
                 return
         raise SelectorChangedError(f"Nao foi possivel localizar campo {fallback_labels}")
 
     async def _click_login(self, page: Page) -> None:
+        timeout = selectors.PROBE_CLICK_TIMEOUT_MS
         try:
-            await page.locator(selectors.SELECTOR_LOGIN_BUTTON).first.click()
+            await page.locator(selectors.SELECTOR_LOGIN_BUTTON).first.click(timeout=timeout)
             return
         except Exception:
             logger.debug("Falha no seletor de login; usando fallback por texto", exc_info=True)
         for txt in selectors.LOGIN_BUTTON_TEXTS:
             with contextlib.suppress(Exception):
-                await page.get_by_role("button", name=re.compile(re.escape(txt), re.IGNORECASE)).first.click()
+                await page.get_by_role("button", name=_ci_pattern(txt)).first.click(timeout=timeout)
                 return
             with contextlib.suppress(Exception):
-                await page.get_by_text(txt, exact=False).first.click()
+                await page.get_by_text(txt, exact=False).first.click(timeout=timeout)
                 return
         raise SelectorChangedError("Nao foi possivel localizar o botao de login")
 
     async def _manual_step_detected(self, page: Page) -> bool:
+        # Testa no proprio navegador e devolve so o bool (sem trafegar o texto inteiro da pagina).
+        script = """
+        (pattern) =>
+          new RegExp(pattern, "i").test((document.body && document.body.textContent) || "")
+        """
         try:
-            body_text = ((await page.text_content("body")) or "").lower()
+            return bool(await page.evaluate(script, selectors.MANUAL_STEP_PATTERN))
         except Exception:
             return False
-        return any(k in body_text for k in selectors.MANUAL_STEP_KEYWORDS)
 
     async def _persist_storage_state(self) -> None:
-        if self.storage_state_path and self._context is not None:
-            self.storage_state_path.parent.mkdir(parents=True, exist_ok=True)
-            await self._context.storage_state(path=str(self.storage_state_path))
+        if not self.storage_state_path or self._context is None:
+            return
+        # Cookies iguais e gravacao recente: nada mudou na sessao, evita serializar/gravar de novo.
+        cookies = await self._context.cookies()
+        fingerprint = hash(
+            tuple(
+                sorted(
+                    (c.get("name"), c.get("domain"), c.get("path"), c.get("value")) for c in cookies
+                )
+            )
+        )
+        now = time.monotonic()
+        if (
+            fingerprint == self._last_state_fingerprint
+            and (now - self._last_state_persist_monotonic) < selectors.STORAGE_STATE_MAX_AGE_S
+        ):
+            return
+        state = await self._context.storage_state()
+        # Serializacao e I/O de disco em thread: nao seguram o event loop.
+        await asyncio.to_thread(self._write_storage_state_file, self.storage_state_path, state)
+        self._last_state_fingerprint = fingerprint
+        self._last_state_persist_monotonic = now
+
+    @staticmethod
+    def _write_storage_state_file(path: Path, state: dict[str, Any]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Grava em arquivo temporario + os.replace para nunca deixar um JSON pela metade.
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            tmp_path.write_text(json.dumps(state), encoding="utf-8")
+            os.replace(tmp_path, path)
+        finally:
+            # Sobra apenas se a escrita falhou antes do replace.
+            tmp_path.unlink(missing_ok=True)
 
     async def login(self, username: str, password: str, *, token: CancelToken | None = None) -> LoginResult:
         page = self._ensure_page()
@@ -756,10 +1597,13 @@ class UtfprScraperAsync:
             )
             self._check_cancel(token)
             await self._click_login(page)
-            # Evita networkidle; usa domcontentloaded + pequeno tempo de respiro.
+            # O submit pode demorar a navegar: espera o formulario sumir (ou o portal aparecer)
+            # antes de olhar o load state, senao o domcontentloaded ainda e o da tela de login.
+            await self._wait_surface_advanced(page, "login", timeout_ms=min(self.timeout_ms, 4000))
+            # Evita networkidle; usa domcontentloaded + espera curta pelo evento load.
             with contextlib.suppress(Exception):
                 await page.wait_for_load_state("domcontentloaded", timeout=self.timeout_ms)
-            await asyncio.sleep(0.25)
+            await self._wait_dom_settled(page, max_ms=250)
             # Alguns fluxos podem retornar para seleção de campus após o submit.
             post_surface: str | None = None
             with contextlib.suppress(SelectorChangedError):
@@ -810,7 +1654,7 @@ class UtfprScraperAsync:
         self._check_cancel(token)
         with contextlib.suppress(Exception):
             await page.wait_for_load_state("domcontentloaded", timeout=self.timeout_ms)
-        await asyncio.sleep(0.2)
+        await self._wait_dom_settled(page, max_ms=200)
         if await self._manual_step_detected(page):
             await self._set_flow_state(
                 PortalFlowState.CAPTCHA_OR_2FA,
@@ -835,11 +1679,7 @@ class UtfprScraperAsync:
     # ---------- Navegação para Turmas Abertas ----------
     async def _prepare_portal_menu_if_needed(self, page: Page, *, token: CancelToken | None = None) -> None:
         self._check_cancel(token)
-        try:
-            body = ((await page.text_content("body")) or "").lower()
-        except Exception:
-            return
-        if not any(k in body for k in selectors.PORTAL_ALUNO_KEYWORDS):
+        if not (await self._probe_surface(page)).body_bits & _BODY_PORTAL_ALUNO:
             return
 
         with contextlib.suppress(Exception):
@@ -852,53 +1692,50 @@ class UtfprScraperAsync:
             )
 
         # Espera o item de menu aparecer na área do menu Ajax (evita confundir com títulos da página).
+        # O predicado e reavaliado no proprio navegador (sem idas e voltas); devolve o primeiro
+        # texto presente.
         script = """
         (args) => {
-          const menuSelector = args?.menuSelector || "";
-          const targetText = args?.targetText || "";
-          const root = document.querySelector(menuSelector);
+          const root = document.querySelector(args.menuSelector || "");
           if (!root) return false;
           const norm = (s) => (s || "").replace(/\\s+/g, " ").trim().toLowerCase();
-          const target = norm(targetText);
-          return norm(root.innerText || root.textContent || "").includes(target);
+          const menuText = norm(root.innerText || root.textContent || "");
+          for (const t of args.targetTexts || []) {
+            if (menuText.includes(norm(t))) return t;
+          }
+          return false;
         }
         """
-        for txt in selectors.TURMAS_ABERTAS_TEXTS:
-            found = False
-            for _ in range(18):
-                self._check_cancel(token)
-                with contextlib.suppress(Exception):
-                    found = bool(
-                        await page.evaluate(
-                            script,
-                            {
-                                "menuSelector": selectors.PORTAL_MENU_CONTAINER_SELECTOR,
-                                "targetText": txt,
-                            },
-                        )
-                    )
-                if found:
-                    break
-                await asyncio.sleep(0.2)
-            if found:
-                logger.info("Menu Ajax do Portal do Aluno carregado com item '%s'", txt)
-                await self._set_flow_state(
-                    PortalFlowState.PORTAL_MENU_READY,
-                    step="portal_menu_ready",
-                    detail=f"Item de menu visivel: {txt}",
-                    page=page,
-                )
-                break
+        self._check_cancel(token)
+        found: str | None = None
+        with contextlib.suppress(Exception):
+            handle = await page.wait_for_function(
+                script,
+                arg={
+                    "menuSelector": selectors.PORTAL_MENU_CONTAINER_SELECTOR,
+                    "targetTexts": list(selectors.TURMAS_ABERTAS_TEXTS),
+                },
+                timeout=3600,
+            )
+            found = str(await handle.json_value())
+        if found:
+            logger.info("Menu Ajax do Portal do Aluno carregado com item '%s'", found)
+            await self._set_flow_state(
+                PortalFlowState.PORTAL_MENU_READY,
+                step="portal_menu_ready",
+                detail=f"Item de menu visivel: {found}",
+                page=page,
+            )
 
     def _all_page_contexts(self, page: Page) -> list[PageLike]:
-        return [page, *[f for f in page.frames if f is not page.main_frame]]
+        return [page, *[f for f in self._cached_frames(page) if f is not page.main_frame]]
 
     def _context_urls_snapshot(self, page: Page) -> tuple[str, ...]:
         urls: list[str] = []
         with contextlib.suppress(Exception):
             if page.url:
                 urls.append(page.url)
-        for frame in page.frames:
+        for frame in self._cached_frames(page):
             if frame is page.main_frame:
                 continue
             with contextlib.suppress(Exception):
@@ -907,28 +1744,34 @@ class UtfprScraperAsync:
         return tuple(sorted(set(urls)))
 
     async def _ctx_looks_like_turmas_abertas(self, ctx: PageLike) -> bool:
-        script = """
-        (keywords) => {
-          const text = ((document.body && (document.body.innerText || document.body.textContent)) || "")
-            .replace(/\\s+/g, " ")
-            .trim()
-            .toLowerCase();
-          if (document.querySelector("table td.t")) return true;
-          if (document.querySelector("table[border='1']")) return true;
-          for (const kw of (keywords || [])) {
-            const k = (kw || "").toLowerCase();
-            if (k && text.includes(k)) return true;
-          }
-          return false;
-        }
-        """
         with contextlib.suppress(Exception):
-            return bool(await ctx.evaluate(script, list(selectors.PORTAL_TURMAS_PAGE_KEYWORDS)))
+            return bool(
+                await self._run_page_helper(
+                    ctx,
+                    "looksLikeTurmas",
+                    _JS_LOOKS_LIKE_TURMAS,
+                    selectors.PORTAL_TURMAS_PAGE_PATTERN,
+                )
+            )
         return False
 
     async def _page_looks_like_turmas_abertas_anywhere(self, page: Page) -> bool:
-        for ctx in self._all_page_contexts(page):
-            if await self._ctx_looks_like_turmas_abertas(ctx):
+        # Uma chamada cobre a pagina e os frames de mesma origem; o loop por frame so roda
+        # quando algum frame nao pode ser lido de dentro da pagina (cross-origin).
+        with contextlib.suppress(Exception):
+            result = await self._run_page_helper(
+                page,
+                "looksLikeTurmasAnywhere",
+                _JS_LOOKS_LIKE_TURMAS_ANYWHERE,
+                selectors.PORTAL_TURMAS_PAGE_PATTERN,
+            )
+            if isinstance(result, dict):
+                if result.get("found"):
+                    return True
+                if not result.get("blocked"):
+                    return False
+        for ctx in self._all_page_contexts(page):
+            if await self._ctx_looks_like_turmas_abertas(ctx):
                 return True
         return False
 
@@ -1010,8 +1853,10 @@ class UtfprScraperAsync:
           const visible = (el) => {
             if (!el) return false;
             const r = el.getBoundingClientRect();
+            if (!r.width || !r.height) return false;
+            if (el.checkVisibility) return el.checkVisibility({ checkVisibilityCSS: true });
             const st = window.getComputedStyle(el);
-            return r.width > 0 && r.height > 0 && st.visibility !== "hidden" && st.display !== "none";
+            return st.visibility !== "hidden" && st.display !== "none";
           };
           const selects = Array.from(document.querySelectorAll("select")).filter(visible);
           let best = null;
@@ -1279,8 +2124,10 @@ class UtfprScraperAsync:
           const visible = (el) => {
             if (!el) return false;
             const r = el.getBoundingClientRect();
+            if (!r.width || !r.height) return false;
+            if (el.checkVisibility) return el.checkVisibility({ checkVisibilityCSS: true });
             const st = window.getComputedStyle(el);
-            return r.width > 0 && r.height > 0 && st.visibility !== "hidden" && st.display !== "none";
+            return st.visibility !== "hidden" && st.display !== "none";
           };
           const explicit = document.querySelector("select#p_curscodnr, select[name='p_curscodnr']");
           const selects = Array.from(document.querySelectorAll("select")).filter(visible);
@@ -1611,18 +2458,50 @@ class UtfprScraperAsync:
         token: CancelToken | None = None,
         timeout_ms: int = 3500,
     ) -> bool:
-        loops = max(1, timeout_ms // 150)
-        for _ in range(loops):
+        # Comeca em 150ms e, apos 5 sondagens sem sinal, espaca ate 500ms (menos sondas sob
+        # latencia alta).
+        deadline = time.monotonic() + max(150, timeout_ms) / 1000
+        interval = 0.15
+        misses = 0
+        while True:
             self._check_cancel(token)
             if await self._page_looks_like_turmas_abertas_anywhere(page):
                 return True
             if self._context_urls_snapshot(page) != baseline_urls:
                 # URL mudou; pode ser a tela de turmas ou uma etapa intermediária.
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            misses += 1
+            if misses > 5:
+                interval = min(0.5, interval * 1.5)
+            await asyncio.sleep(min(interval, remaining))
+
+    async def _poll_turmas_until_dom_ready(self, page: Page, *, interval: float = 0.15) -> bool:
+        """Sonda a tela de Turmas enquanto o documento carrega (apos `goto` com `commit`).
+
+        Retorna assim que a tabela aparece; se o DOMContentLoaded chegar sem ela, faz uma
+        ultima checagem apos o `load` (frames internos) e desiste.
+        """
+        dom_ready = asyncio.ensure_future(
+            page.wait_for_load_state("domcontentloaded", timeout=self.timeout_ms)
+        )
+        try:
+            while not dom_ready.done():
+                # Frames surgem durante o carregamento; nao reaproveita o snapshot anterior.
+                self._invalidate_frames_cache()
                 if await self._page_looks_like_turmas_abertas_anywhere(page):
                     return True
-                return True
-            await asyncio.sleep(0.15)
-        return False
+                await asyncio.wait({dom_ready}, timeout=interval)
+        finally:
+            if not dom_ready.done():
+                dom_ready.cancel()
+            elif not dom_ready.cancelled():
+                dom_ready.exception()  # consome o timeout, se houve, para nao virar warning do loop
+        self._invalidate_frames_cache()
+        await self._wait_dom_settled(page, max_ms=250)
+        return await self._page_looks_like_turmas_abertas_anywhere(page)
 
     async def _try_open_turmas_direct_routes(
         self,
@@ -1644,9 +2523,8 @@ class UtfprScraperAsync:
             target_url = urljoin(current_url, rel_path)
             logger.info("Tentando abrir Turmas Abertas por rota direta: %s", target_url)
             with contextlib.suppress(Exception):
-                await page.goto(target_url, wait_until="domcontentloaded", timeout=self.timeout_ms)
-                await asyncio.sleep(0.25)
-                if await self._page_looks_like_turmas_abertas_anywhere(page):
+                await page.goto(target_url, wait_until="commit", timeout=self.timeout_ms)
+                if await self._poll_turmas_until_dom_ready(page):
                     logger.info("Turmas Abertas abertas por rota direta: %s", rel_path)
                     return page
                 clicked_confirm = await self._maybe_click_confirm_anywhere(page, token=token)
@@ -1664,12 +2542,29 @@ class UtfprScraperAsync:
           const targetText = args?.targetText || "";
           const norm = (s) => (s || "").replace(/\\s+/g, " ").trim().toLowerCase();
           const target = norm(targetText);
+          // Pre-filtro por textContent (nao forca layout) ignorando espacos: `<br>`/blocos entre as
+          // palavras somem no textContent mas viram espaco no innerText.
+          const compact = (s) => (s || "").replace(/\\s+/g, "").toLowerCase();
+          const targetCompact = compact(targetText);
           const root = document.querySelector(menuSelector) || document.body;
-          const visible = (el) => {
+          const isShown = (el) => {
             if (!el) return false;
             const r = el.getBoundingClientRect();
+            if (!r.width || !r.height) return false;
+            if (el.checkVisibility) return el.checkVisibility({ checkVisibilityCSS: true });
             const st = window.getComputedStyle(el);
-            return r.width > 0 && r.height > 0 && st.visibility !== 'hidden' && st.display !== 'none';
+            return st.visibility !== 'hidden' && st.display !== 'none';
+          };
+          // Memo por no: ancestrais de closest() e alvos repetidos nao recalculam layout/estilo.
+          const seen = new WeakMap();
+          const visible = (el) => {
+            if (!el) return false;
+            let v = seen.get(el);
+            if (v === undefined) {
+              v = isShown(el);
+              seen.set(el, v);
+            }
+            return v;
           };
           const isClickable = (el) => {
             if (!el) return false;
@@ -1678,7 +2573,11 @@ class UtfprScraperAsync:
             const cls = (el.className || '').toString().toLowerCase();
             return /button|menu|item|link/.test(cls);
           };
-          const nodes = Array.from(root.querySelectorAll('*')).filter(visible);
+          // So candidatos plausiveis; texto (barato) antes da visibilidade (layout/estilo).
+          const nodes = root.querySelectorAll(
+            'a,button,[role="button"],[onclick],li,td,' +
+              'div[class*="menu"],div[class*="item"],div[class*="link"]'
+          );
           const fire = (node) => {
             for (const type of ['pointerdown','mousedown','mouseup','click']) {
               try { node.dispatchEvent(new MouseEvent(type, { bubbles: true, cancelable: true, view: window })); } catch (_) {}
@@ -1686,9 +2585,9 @@ class UtfprScraperAsync:
             try { node.click(); } catch (_) {}
           };
           for (const el of nodes) {
-            const txt = norm(el.innerText || el.textContent || '');
-            if (!txt || !txt.includes(target)) continue;
-            const clickable = el.closest('a,button,[onclick],[role=\"button\"],div,td');
+            if (!compact(el.textContent).includes(targetCompact) || !visible(el)) continue;
+            if (!norm(el.innerText || el.textContent || '').includes(target)) continue;
+            const clickable = el.closest('a,button,[onclick],[role="button"],div,td');
             const candidate = (clickable && visible(clickable) && isClickable(clickable)) ? clickable : el;
             if (visible(candidate)) {
               try { candidate.scrollIntoView({ block: 'center', inline: 'center' }); } catch (_) {}
@@ -1712,17 +2611,38 @@ class UtfprScraperAsync:
                 return True
         return False
 
-    async def _click_turmas_in_iframes_js(self, page: Page, target_text: str) -> bool:
-        """Tenta clicar em 'Turmas Abertas' dentro de iframes (ex.: if_navega/favoritos)."""
+    async def _click_turmas_in_iframes_js(self, page: Page, target_texts: Sequence[str]) -> bool:
+        """Tenta clicar em 'Turmas Abertas' dentro de iframes (ex.: if_navega/favoritos).
+
+        Todos os textos vao numa unica chamada por frame; cada no e testado contra todos eles.
+        Os frames sao sondados em paralelo (sem clicar) e o clique vai so para o primeiro com
+        alvo, na ordem dos frames, para nunca disparar dois cliques.
+        """
         script = """
-        (targetText) => {
+        ({ texts: targetTexts, click }) => {
           const norm = (s) => (s || "").replace(/\\s+/g, " ").trim().toLowerCase();
-          const target = norm(targetText);
-          const visible = (el) => {
+          const compact = (s) => (s || "").replace(/\\s+/g, "").toLowerCase();
+          const targets = (targetTexts || [])
+            .map((raw) => ({ text: norm(raw), compact: compact(raw) }))
+            .filter((t) => t.text);
+          if (!targets.length) return false;
+          const isShown = (el) => {
             if (!el) return false;
             const r = el.getBoundingClientRect();
+            if (!r.width || !r.height) return false;
+            if (el.checkVisibility) return el.checkVisibility({ checkVisibilityCSS: true });
             const st = window.getComputedStyle(el);
-            return r.width > 0 && r.height > 0 && st.visibility !== "hidden" && st.display !== "none";
+            return st.visibility !== "hidden" && st.display !== "none";
+          };
+          const seen = new WeakMap();
+          const visible = (el) => {
+            if (!el) return false;
+            let v = seen.get(el);
+            if (v === undefined) {
+              v = isShown(el);
+              seen.set(el, v);
+            }
+            return v;
           };
           const isClickable = (el) => {
             if (!el) return false;
@@ -1731,7 +2651,12 @@ class UtfprScraperAsync:
             const cls = String(el.className || "").toLowerCase();
             return /button|btn|menu|item|link|card/.test(cls);
           };
-          const nodes = Array.from(document.querySelectorAll("*")).filter(visible);
+          // So candidatos plausiveis; texto (barato) antes da visibilidade (layout/estilo).
+          const nodes = document.querySelectorAll(
+            "a,button,[role='button'],[onclick],li,td," +
+              "div[class*='menu'],div[class*='item'],div[class*='link']," +
+              "div[class*='card'],div[class*='btn']"
+          );
           const fire = (node) => {
             for (const type of ["pointerdown","mousedown","mouseup","click"]) {
               try { node.dispatchEvent(new MouseEvent(type, { bubbles: true, cancelable: true, view: window })); } catch (_) {}
@@ -1739,64 +2664,155 @@ class UtfprScraperAsync:
             try { node.click(); } catch (_) {}
           };
           for (const el of nodes) {
-            const txt = norm(el.innerText || el.textContent || "");
-            if (!txt || !txt.includes(target)) continue;
+            const content = compact(el.textContent);
+            const hits = targets.filter((t) => content.includes(t.compact));
+            if (!hits.length || !visible(el)) continue;
+            const rendered = norm(el.innerText || el.textContent || "");
+            if (!hits.some((t) => rendered.includes(t.text))) continue;
             const clickable = el.closest("a,button,[onclick],[role='button'],div,td,li");
             const candidate = clickable || el;
             if (!visible(candidate)) continue;
-            try { candidate.scrollIntoView({ block: "center", inline: "center" }); } catch (_) {}
-            fire(candidate);
+            if (click) {
+              try { candidate.scrollIntoView({ block: "center", inline: "center" }); } catch (_) {}
+              fire(candidate);
+            }
             return true;
           }
           return false;
         }
         """
-        for frame in page.frames:
-            if frame is page.main_frame:
+        texts = list(target_texts)
+        frames = [frame for frame in self._cached_frames(page) if frame is not page.main_frame]
+        hits = await asyncio.gather(
+            *(frame.evaluate(script, {"texts": texts, "click": False}) for frame in frames),
+            return_exceptions=True,
+        )
+        for frame, hit in zip(frames, hits):
+            if hit is not True:
                 continue
             with contextlib.suppress(Exception):
-                clicked = bool(await frame.evaluate(script, target_text))
-                if clicked:
-                    logger.info("Clique JS em iframe no item '%s' executado", target_text)
+                if await frame.evaluate(script, {"texts": texts, "click": True}):
+                    logger.info("Clique JS em iframe no item %s executado", texts)
                     return True
         return False
 
+    async def _probe_turmas_click_strategy(self, page: Page) -> tuple[str, str] | None:
+        """Descobre numa chamada JS qual estrategia de clique tem alvo visivel em Turmas Abertas."""
+        script = """
+        (args) => {
+          const norm = (s) => (s || "").replace(/\\s+/g, " ").trim().toLowerCase();
+          const compact = (s) => (s || "").replace(/\\s+/g, "").toLowerCase();
+          const isShown = (el) => {
+            const r = el.getBoundingClientRect();
+            if (!r.width || !r.height) return false;
+            if (el.checkVisibility) return el.checkVisibility({ checkVisibilityCSS: true });
+            const st = window.getComputedStyle(el);
+            return st.visibility !== "hidden" && st.display !== "none";
+          };
+          // Cada texto de args.texts revarre os mesmos nos; a visibilidade fica memoizada.
+          const seen = new WeakMap();
+          const visible = (el) => {
+            if (!el) return false;
+            let v = seen.get(el);
+            if (v === undefined) {
+              v = isShown(el);
+              seen.set(el, v);
+            }
+            return v;
+          };
+          // Hints CSS puros primeiro (mesma ordem do fallback); `:has-text` nao roda no DOM e e
+          // pulado.
+          for (const css of (args?.cssSelectors || [])) {
+            let el = null;
+            try { el = document.querySelector(css); } catch (_) { continue; }
+            if (el && visible(el)) return { kind: "css", value: css };
+          }
+          const menu = document.querySelector(args?.menuSelector || "");
+          for (const raw of (args?.texts || [])) {
+            const target = norm(raw);
+            if (!target) continue;
+            const targetCompact = compact(raw);
+            // textContent (sem layout) filtra antes; innerText so confirma candidatos.
+            const hit = (css, root) => {
+              // Varre a NodeList direto e para no primeiro alvo, sem copiar a lista para um array.
+              const nodes = (root || document).querySelectorAll(css);
+              for (let i = 0; i < nodes.length; i++) {
+                const el = nodes[i];
+                if (!compact(el.textContent).includes(targetCompact) || !visible(el)) continue;
+                if (norm(el.innerText || el.textContent || "").includes(target)) return true;
+              }
+              return false;
+            };
+            if (menu && hit("a, button, [onclick], li, td, div", menu)) {
+              return { kind: "portal_menu_js", value: raw };
+            }
+            if (hit("a")) return { kind: "role_link", value: raw };
+            if (hit("button")) return { kind: "role_button", value: raw };
+          }
+          return null;
+        }
+        """
+        with contextlib.suppress(Exception):
+            result = await page.evaluate(
+                script,
+                {
+                    "menuSelector": selectors.PORTAL_MENU_CONTAINER_SELECTOR,
+                    "texts": list(selectors.TURMAS_ABERTAS_TEXTS),
+                    "cssSelectors": list(selectors.TURMAS_ABERTAS_SELECTOR_HINTS),
+                },
+            )
+            if isinstance(result, dict) and result.get("kind"):
+                return (str(result["kind"]), str(result.get("value", "")))
+        return None
+
     async def _click_turmas_with_optional_popup(self, page: Page, *, token: CancelToken | None = None) -> Page:
         self._check_cancel(token)
         await self._prepare_portal_menu_if_needed(page, token=token)
         locators = []
         for css in selectors.TURMAS_ABERTAS_SELECTOR_HINTS:
             locators.append(("css", css))
-        for text in selectors.TURMAS_ABERTAS_TEXTS:
+        texts = tuple(selectors.TURMAS_ABERTAS_TEXTS)
+        for text in texts:
             locators.append(("portal_menu_js", text))
-            locators.append(("iframe_js", text))
-            locators.append(("role_link", text))
-            locators.append(("role_button", text))
-            locators.append(("text", text))
+        # Todos os textos numa unica varredura por iframe.
+        locators.append(("iframe_js", texts))
+        locators.append(("role_link", _TURMAS_TEXT_RE))
+        locators.append(("role_button", _TURMAS_TEXT_RE))
+        locators.append(("text", _TURMAS_TEXT_RE))
+
+        # Sonda unica no DOM: coloca na frente a estrategia que ja tem alvo visivel,
+        # evitando pagar o timeout de popup das estrategias que falhariam antes dela.
+        preferred = await self._probe_turmas_click_strategy(page)
+        if preferred is not None and preferred[0] in ("role_link", "role_button"):
+            # Link/botao sao tentados com a regex unica, qualquer que seja o texto que casou.
+            preferred = (preferred[0], _TURMAS_TEXT_RE)
+        if preferred is not None and preferred in locators:
+            locators.remove(preferred)
+            locators.insert(0, preferred)
+        elif preferred is None:
+            # Nada visivel no documento principal: o alvo so pode estar em iframe.
+            locators.sort(key=lambda item: item[0] != "iframe_js")
 
         for kind, value in locators:
             try:
                 baseline_urls = self._context_urls_snapshot(page)
 
                 async def _do_click() -> None:
+                    timeout = selectors.PROBE_CLICK_TIMEOUT_MS
                     if kind == "css":
-                        await page.locator(str(value)).first.click()
+                        await page.locator(str(value)).first.click(timeout=timeout)
                     elif kind == "role_link":
-                        await page.get_by_role(
-                            "link", name=re.compile(re.escape(str(value)), re.IGNORECASE)
-                        ).first.click()
+                        await page.get_by_role("link", name=value).first.click(timeout=timeout)
                     elif kind == "role_button":
-                        await page.get_by_role(
-                            "button", name=re.compile(re.escape(str(value)), re.IGNORECASE)
-                        ).first.click()
+                        await page.get_by_role("button", name=value).first.click(timeout=timeout)
                     elif kind == "portal_menu_js":
                         if not await self._click_portal_turmas_menu_js(page, str(value)):
                             raise SelectorChangedError("Falha no clique JS do menu Turmas Abertas")
                     elif kind == "iframe_js":
-                        if not await self._click_turmas_in_iframes_js(page, str(value)):
+                        if not await self._click_turmas_in_iframes_js(page, value):
                             raise SelectorChangedError("Falha no clique JS em iframe para Turmas Abertas")
                     else:
-                        await page.get_by_text(str(value), exact=False).first.click()
+                        await page.get_by_text(value).first.click(timeout=timeout)
 
                 popup: Page | None = None
                 try:
@@ -1810,6 +2826,7 @@ class UtfprScraperAsync:
                 target_page = popup or page
                 with contextlib.suppress(Exception):
                     await target_page.wait_for_load_state("domcontentloaded", timeout=self.timeout_ms)
+                self._invalidate_frames_cache()
                 if popup is not None:
                     # Popup abriu; valida se parece ser a página de turmas.
                     if await self._page_looks_like_turmas_abertas_anywhere(target_page):
@@ -1835,45 +2852,34 @@ class UtfprScraperAsync:
 
     async def _maybe_click_confirm(self, ctx: PageLike, *, token: CancelToken | None = None) -> bool:
         self._check_cancel(token)
-        # Tenta primeiro por CSS.
-        for css in selectors.CONFIRM_BUTTON_SELECTORS:
-            try:
-                locator = ctx.locator(css).first
-                if await locator.count() == 0:
-                    continue
-                if not await locator.is_visible():
-                    continue
-                await locator.click()
+        # Tenta primeiro por CSS: todos os seletores numa unica ida ao navegador.
+        with contextlib.suppress(Exception):
+            if await ctx.evaluate(_JS_CLICK_FIRST_VISIBLE, _CONFIRM_BUTTON_SELECTORS):
+                return True
+        # Fallback por texto no DOM: todos os textos numa unica chamada, respeitando a ordem
+        # de prioridade de CONFIRM_BUTTON_TEXTS.
+        script = """
+        (targets) => {
+          const norm = (s) => (s || '').replace(/\\s+/g,' ').trim().toLowerCase();
+          const els = Array.from(document.querySelectorAll('button, a, input[type="submit"], input[type="button"]'));
+          const contents = els.map((el) => norm(el.innerText || el.value || ''));
+          for (const target of targets.map(norm)) {
+            const idx = contents.findIndex((content) => content.includes(target));
+            if (idx >= 0) { els[idx].click(); return true; }
+          }
+          return false;
+        }
+        """
+        with contextlib.suppress(Exception):
+            if await ctx.evaluate(script, _CONFIRM_BUTTON_TEXTS):
                 return True
-            except Exception:
-                continue
-        # Fallback por texto no DOM.
-        for text in selectors.CONFIRM_BUTTON_TEXTS:
-            script = """
-            (txt) => {
-              const norm = (s) => (s || '').replace(/\\s+/g,' ').trim().toLowerCase();
-              const target = norm(txt);
-              const els = Array.from(document.querySelectorAll('button, a, input[type="submit"], input[type="button"]'));
-              for (const el of els) {
-                const content = norm(el.innerText || el.value || '');
-                if (content.includes(target)) { el.click(); return true; }
-              }
-              return false;
-            }
-            """
-            try:
-                clicked = await ctx.evaluate(script, text)
-                if clicked:
-                    return True
-            except Exception:
-                continue
         return False
 
     async def _maybe_click_confirm_anywhere(self, page: Page, *, token: CancelToken | None = None) -> bool:
         self._check_cancel(token)
         if await self._maybe_click_confirm(page, token=token):
             return True
-        for frame in page.frames:
+        for frame in self._cached_frames(page):
             if frame is page.main_frame:
                 continue
             self._check_cancel(token)
@@ -1891,56 +2897,29 @@ class UtfprScraperAsync:
     ) -> None:
         self._check_cancel(token)
         effective_timeout = self.timeout_ms if timeout_ms is None else max(100, timeout_ms)
-        await ctx.wait_for_selector(selectors.TURMAS_PAGE_TABLE_ANCHOR, timeout=effective_timeout)
-        self._check_cancel(token)
-        await ctx.wait_for_function(selectors.TURMAS_ROWS_FUNCTION, timeout=effective_timeout)
+        await ctx.wait_for_function(
+            _JS_TABLE_READY,
+            arg=selectors.TURMAS_PAGE_TABLE_ANCHOR,
+            timeout=effective_timeout,
+        )
 
     async def _ctx_looks_like_turmas_filter_screen(self, ctx: PageLike) -> bool:
-        script = """
-        () => {
-          const hasCourseSelect = !!document.querySelector("select#p_curscodnr, select[name='p_curscodnr']");
-          const hasCampusSelect = !!document.querySelector("select#p_unidcodnr, select[name='p_unidcodnr']");
-          const hasInnerListFrame = !!document.querySelector("iframe#if_listahorario, iframe[name='if_listahorario']");
-          const bodyText = ((document.body && (document.body.innerText || document.body.textContent)) || "")
-            .replace(/\\s+/g, " ")
-            .toLowerCase();
-          return (hasCourseSelect || hasCampusSelect) && (
-            hasInnerListFrame || bodyText.includes("relação de turmas abertas para a matrícula") || bodyText.includes("relacao de turmas abertas para a matricula")
-          );
-        }
-        """
         with contextlib.suppress(Exception):
-            return bool(await ctx.evaluate(script))
+            return bool(await self._run_page_helper(ctx, "isFilterScreen", _JS_IS_FILTER_SCREEN))
         return False
 
     async def _ctx_has_real_turmas_table(self, ctx: PageLike) -> bool:
         """Distingue tabela real de aulas da tela de filtro (campus/curso/confirmar)."""
-        script = """
-        () => {
-          const hasCourseSelect = !!document.querySelector("select#p_curscodnr, select[name='p_curscodnr']");
-          const hasInnerListFrame = !!document.querySelector("iframe#if_listahorario, iframe[name='if_listahorario']");
-          const legacyTitle = !!document.querySelector("table td.t");
-          const dataCells = document.querySelectorAll("table td.sl, table td.sc, table td.sr").length;
-          const headerBlob = ((document.body && (document.body.innerText || document.body.textContent)) || "")
-            .replace(/\\s+/g, " ")
-            .toLowerCase();
-
-          // Tela intermediaria de filtro: nao considerar como tabela final.
-          if (hasCourseSelect || hasInnerListFrame) {
-            // Se a pagina/iframe atual ainda exibe o filtro, ela nao e a tabela final.
-            if (hasInnerListFrame || headerBlob.includes("confirmar>>")) return false;
-          }
-
-          if (legacyTitle) return true;
-          // Fallback generico: muitas celulas de dados sem o filtro de curso.
-          if (!hasCourseSelect && dataCells >= 12) return true;
-          return false;
-        }
-        """
         with contextlib.suppress(Exception):
-            return bool(await ctx.evaluate(script))
+            return bool(await self._run_page_helper(ctx, "hasRealTable", _JS_HAS_REAL_TABLE))
         return False
 
+    async def _ctx_still_shows_table(self, ctx: PageLike) -> bool:
+        is_detached = getattr(ctx, "is_detached", None)
+        if callable(is_detached) and is_detached():
+            return False
+        return await self._ctx_has_real_turmas_table(ctx)
+
     async def _find_frame_with_table(
         self,
         page: Page,
@@ -1959,7 +2938,7 @@ class UtfprScraperAsync:
             self._check_cancel(token)
             contexts: list[PageLike] = [page]
 
-            frames = [f for f in page.frames if f is not page.main_frame]
+            frames = [f for f in self._cached_frames(page) if f is not page.main_frame]
             # Prioriza o iframe de listagem real (pcExibirTurmas), quando existir.
             def _frame_priority(frm) -> tuple[int, str]:
                 url = (getattr(frm, "url", "") or "").lower()
@@ -1969,19 +2948,40 @@ class UtfprScraperAsync:
 
             contexts.extend(sorted(frames, key=_frame_priority))
 
-            for ctx in contexts:
-                self._check_cancel(token)
-                remaining_ms = int(max(100, (deadline - time.monotonic()) * 1000))
-                per_ctx_timeout = min(600, remaining_ms)
-                try:
-                    await self._wait_table_anchor(ctx, token=token, timeout_ms=per_ctx_timeout)
-                except Exception:
-                    continue
-                if await self._ctx_looks_like_turmas_filter_screen(ctx):
-                    saw_filter_like_context = True
-                    continue
-                if await self._ctx_has_real_turmas_table(ctx):
-                    return ctx
+            remaining_ms = int(max(100, (deadline - time.monotonic()) * 1000))
+            per_ctx_timeout = min(600, remaining_ms)
+            # Espera a ancora em todos os contextos ao mesmo tempo e checa cada um assim que fica
+            # pronto (antes cada frame gastava seu timeout em sequencia); prontos juntos seguem a
+            # prioridade.
+            waits = {
+                asyncio.ensure_future(
+                    self._wait_table_anchor(ctx, token=token, timeout_ms=per_ctx_timeout)
+                ): idx
+                for idx, ctx in enumerate(contexts)
+            }
+            pending = set(waits)
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in sorted(done, key=waits.__getitem__):
+                        if task.cancelled():
+                            continue
+                        exc = task.exception()
+                        if isinstance(exc, CancelledError):
+                            raise exc
+                        if exc is not None:
+                            continue
+                        ctx = contexts[waits[task]]
+                        if await self._ctx_looks_like_turmas_filter_screen(ctx):
+                            saw_filter_like_context = True
+                            continue
+                        if await self._ctx_has_real_turmas_table(ctx):
+                            return ctx
+            finally:
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    await asyncio.gather(*pending, return_exceptions=True)
 
             await asyncio.sleep(0.18)
 
@@ -1990,85 +2990,74 @@ class UtfprScraperAsync:
         return None
 
     async def go_to_turmas_abertas(self, *, token: CancelToken | None = None) -> None:
-        page = self._ensure_page()
-        self._check_cancel(token)
-        try:
-            await self._set_flow_state(
-                PortalFlowState.TURMAS_ABERTAS_ENTRY,
-                step="go_to_turmas_abertas",
-                detail="Iniciando abertura de Turmas Abertas",
-                page=page,
-            )
-            target_page = await self._try_open_turmas_direct_routes(page, token=token)
-            if target_page is None:
-                target_page = await self._click_turmas_with_optional_popup(page, token=token)
-            if not await self._page_looks_like_turmas_abertas_anywhere(target_page):
-                retried_page = await self._try_open_turmas_direct_routes(target_page, token=token)
-                if retried_page is not None:
-                    target_page = retried_page
-
-            # Se abriu popup, passa a usar a nova aba como pagina ativa.
-            self.page = target_page
+        with self._cancel_current_task_on(token):
+            page = self._ensure_page()
             self._check_cancel(token)
-            with contextlib.suppress(Exception):
-                await target_page.wait_for_load_state("domcontentloaded", timeout=self.timeout_ms)
+            try:
+                await self._set_flow_state(
+                    PortalFlowState.TURMAS_ABERTAS_ENTRY,
+                    step="go_to_turmas_abertas",
+                    detail="Iniciando abertura de Turmas Abertas",
+                    page=page,
+                )
+                target_page = await self._try_open_turmas_direct_routes(page, token=token)
+                if target_page is None:
+                    target_page = await self._click_turmas_with_optional_popup(page, token=token)
+                if not await self._page_looks_like_turmas_abertas_anywhere(target_page):
+                    retried_page = await self._try_open_turmas_direct_routes(
+                        target_page, token=token
+                    )
+                    if retried_page is not None:
+                        target_page = retried_page
 
-            # Aceita tanto tabela pronta quanto estado intermediario que exige curso.
-            await self.ensure_turmas_table_ready(token=token)
-        except CourseSelectionRequired:
-            # Estado esperado: tela de Turmas Abertas aberta aguardando selecao do curso.
-            raise
-        except (PlaywrightError, PlaywrightTimeoutError, CancelledError, ScraperError, SelectorChangedError):
-            await self._set_flow_state(
-                PortalFlowState.FAILED,
-                step="go_to_turmas_abertas_error",
-                detail="Falha ao abrir Turmas Abertas",
-                page=page,
-            )
-            await self._save_debug_artifacts("turmas_nav_error")
-            raise
+                # Se abriu popup, passa a usar a nova aba como pagina ativa.
+                self.page = target_page
+                self._check_cancel(token)
+                with contextlib.suppress(Exception):
+                    await target_page.wait_for_load_state("domcontentloaded", timeout=self.timeout_ms)
+                self._invalidate_frames_cache()
+
+                # Aceita tanto tabela pronta quanto estado intermediario que exige curso.
+                await self.ensure_turmas_table_ready(token=token)
+            except CourseSelectionRequired:
+                # Estado esperado: tela de Turmas Abertas aberta aguardando selecao do curso.
+                raise
+            except (PlaywrightError, PlaywrightTimeoutError, CancelledError, ScraperError, SelectorChangedError):
+                await self._set_flow_state(
+                    PortalFlowState.FAILED,
+                    step="go_to_turmas_abertas_error",
+                    detail="Falha ao abrir Turmas Abertas",
+                    page=page,
+                )
+                await self._save_debug_artifacts("turmas_nav_error")
+                raise
 
     # ---------- Extração rápida ----------
-    async def _extract_tables_fast(self, ctx: PageLike) -> list[dict[str, Any]]:
-        script = """
-        () => {
-          const clean = (s) => (s || "").replace(/\\s+/g, " ").trim();
-          const norm = (s) => clean(s).toLowerCase();
-          const collectContext = (table) => {
-            const texts = [];
-            if (table.caption) texts.push(clean(table.caption.innerText));
-            let node = table.previousElementSibling;
-            let hops = 0;
-            while (node && hops < 6) {
-              const txt = clean(node.innerText || node.textContent || "");
-              if (txt) texts.push(txt);
-              node = node.previousElementSibling;
-              hops++;
-            }
-            return texts;
-          };
-          const tables = Array.from(document.querySelectorAll("table"));
-          return tables.map((table, idx) => {
-            let headers = Array.from(table.querySelectorAll("thead th")).map(th => clean(th.innerText));
-            if (!headers.length) {
-              const headRow = table.querySelector("tr");
-              if (headRow) {
-                headers = Array.from(headRow.children).map(el => clean(el.innerText));
-              }
-            }
-            const rows = Array.from(table.querySelectorAll("tbody tr"))
-              .map(tr => Array.from(tr.querySelectorAll("td")).map(td => clean(td.innerText)))
-              .filter(row => row.some(Boolean));
-            return {
-              index: idx,
-              headers,
-              rows,
-              context_texts: collectContext(table),
-            };
-          }).filter(t => t.rows.length > 0);
-        }
+    async def _run_page_helper(
+        self,
+        ctx: PageLike,
+        name: str,
+        script: str,
+        arg: Any | None = None,
+        *,
+        side_effects: bool = False,
+    ) -> Any:
+        """Chama o helper pre-instalado por init script; sem ele (documento antigo), envia o JS.
+
+        Helpers com `side_effects` (cliques) nao passam pela sessao CDP de `_evaluate_fast`.
         """
-        return await ctx.evaluate(script)
+        call = (
+            f"(arg) => {{ const fn = window.{_JS_HELPERS_GLOBAL}?.{name}; "
+            "return fn ? fn(arg) : null; }"
+        )
+        evaluate = ctx.evaluate if side_effects else functools.partial(self._evaluate_fast, ctx)
+        result = await evaluate(call, arg)
+        if result is not None:
+            return result
+        return await evaluate(script, arg)
+
+    async def _extract_tables_fast(self, ctx: PageLike) -> list[dict[str, Any]]:
+        return await self._run_page_helper(ctx, "tables", _JS_EXTRACT_TABLES)
 
     async def _extract_utfpr_turmas_rows_fast(self, ctx: PageLike) -> list[dict[str, Any]]:
         """Extrai linhas da tabela legacy de Turmas Abertas (UTFPR) em uma chamada JS.
@@ -2082,98 +3071,10 @@ class UtfprScraperAsync:
         Este extrator remove `td.dn`, preserva o contexto da disciplina atual e retorna
         registros ja normalizados por posicao visivel da linha.
         """
-        script = """
-        () => {
-          const clean = (s) => (s || "")
-            .replace(/\\u00a0/g, " ")
-            .replace(/\\s+/g, " ")
-            .trim();
-          const hasClass = (value, cls) => new RegExp("(^|\\\\s)" + cls + "(\\\\s|$)", "i").test(String(value || ""));
-
-          const rootTable =
-            document.querySelector("table[border='1']") ||
-            Array.from(document.querySelectorAll("table")).find(
-              (t) => t.querySelector("td.t") && t.querySelector("td.sl, td.sc, td.sr")
-            );
-
-          if (!rootTable) return [];
-
-          let currentDisciplinaCodigo = "";
-          let currentDisciplinaNome = "";
-          const out = [];
-
-          const rowList = rootTable.rows ? Array.from(rootTable.rows) : Array.from(rootTable.querySelectorAll("tr"));
-
-          for (const tr of rowList) {
-            const trCells = tr.cells ? Array.from(tr.cells) : Array.from(tr.querySelectorAll("td"));
-            if (!trCells.length) continue;
-
-            let titleCell = null;
-            for (const td of trCells) {
-              if (hasClass(td.className, "t")) {
-                titleCell = td;
-                break;
-              }
-            }
-            if (titleCell) {
-              const titleNode = titleCell.querySelector("b") || titleCell;
-              const rawTitle = clean(titleNode.textContent || "");
-              const m = rawTitle.match(/^([A-Z]{2,}\\d+[A-Z0-9]*)\\s*[-–]\\s*(.+)$/i);
-              if (m) {
-                currentDisciplinaCodigo = clean(m[1]).toUpperCase();
-                currentDisciplinaNome = clean(m[2]);
-              }
-              continue;
-            }
-
-            const cells = trCells
-              .filter((td) => !hasClass(td.className, "dn"))
-              .map((td) => ({
-                // `innerText` força layout e pode ficar muito lento nessa tabela gigante.
-                text: clean(td.textContent || ""),
-                cls: String(td.className || "").toLowerCase(),
-              }));
-            if (!cells.length) continue;
-
-            const headerBlob = cells.map((c) => c.text.toLowerCase()).join(" | ");
-            if (
-              headerBlob.includes("horário (dia/turno/aula)") ||
-              headerBlob.includes("horario (dia/turno/aula)")
-            ) {
-              continue;
-            }
-
-            const firstCls = cells[0].cls;
-            if (!hasClass(firstCls, "sl") && !hasClass(firstCls, "sc") && !hasClass(firstCls, "sr")) {
-              continue;
-            }
-
-            const get = (i) => clean((cells[i] && cells[i].text) || "");
-            const turmaCodigo = get(0);
-            if (!turmaCodigo || !/^[A-Za-z0-9]+$/.test(turmaCodigo)) continue;
-
-            out.push({
-              disciplina_codigo: currentDisciplinaCodigo,
-              disciplina_nome: currentDisciplinaNome,
-              turma_codigo: turmaCodigo,
-              enquadramento: get(1),
-              vagas_total: get(2),
-              vagas_calouros: get(3),
-              reserva: get(4),
-              prioridade: get(5),
-              horario_raw: get(6),
-              professor: get(7),
-              optativa: get(8),
-            });
-          }
-
-          return out;
-        }
-        """
         try:
             # Evita ficar preso por dezenas de segundos em `evaluate()` se o frame travar.
             return await asyncio.wait_for(
-                ctx.evaluate(script),
+                self._run_page_helper(ctx, "utfprRows", _JS_EXTRACT_UTFPR_ROWS),
                 timeout=min(5.0, max(1.0, self.timeout_ms / 1000.0)),
             )
         except asyncio.TimeoutError:
@@ -2183,45 +3084,73 @@ class UtfprScraperAsync:
             logger.debug("Falha no extrator UTFPR via JS; usando fallback por HTML", exc_info=True)
             return []
 
+    async def _extract_any_fast(self, ctx: PageLike) -> tuple[str, list[dict[str, Any]]] | None:
+        """Extrator legacy com fallback para tabelas genericas numa unica chamada JS.
+
+        Devolve `("utfpr_js", linhas)` ou `("tables", tabelas)`; `None` se a chamada falhou.
+        """
+        try:
+            result = await asyncio.wait_for(
+                self._run_page_helper(ctx, "extractAny", _JS_EXTRACT_ANY),
+                timeout=min(5.0, max(1.0, self.timeout_ms / 1000.0)),
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Extrator JS excedeu timeout; usando fallback por HTML")
+            return None
+        except Exception:
+            logger.debug("Falha no extrator JS combinado", exc_info=True)
+            return None
+        if not isinstance(result, dict):
+            return None
+        if result.get("kind") == "utfpr":
+            return ("utfpr_js", result.get("rows") or [])
+        return ("tables", result.get("tables") or [])
+
     async def _extract_utfpr_turmas_rows_from_html_source(self, ctx: PageLike) -> list[dict[str, Any]]:
         html_text = await self._ctx_content_html(ctx)
         if not html_text:
             return []
 
-        root_match = re.search(
-            r"(?is)<table\b[^>]*border\s*=\s*['\"]?1['\"]?[^>]*>(?P<body>.*?)</table>",
-            html_text,
-        )
+        rows = list(self._iter_utfpr_rows_from_html(html_text))
+        if rows:
+            logger.info("Tabela UTFPR legacy extraida via codigo-fonte HTML (%d linhas)", len(rows))
+        return rows
+
+    @classmethod
+    def _iter_utfpr_rows_from_html(cls, html_text: str) -> Iterator[dict[str, Any]]:
+        """Percorre as linhas da tabela legacy sob demanda, sem acumular fragmentos intermediarios.
+
+        Apenas o trecho da tabela principal e mantido; o HTML completo deixa de ser referenciado
+        assim que a tabela e localizada.
+        """
+        root_match = _HTML_MAIN_TABLE_RE.search(html_text)
         table_html = root_match.group("body") if root_match else html_text
-        rows: list[dict[str, Any]] = []
+        del html_text, root_match
         current_disc_codigo = ""
         current_disc_nome = ""
 
-        for tr_match in re.finditer(r"(?is)<tr\b[^>]*>(?P<body>.*?)</tr>", table_html):
+        for tr_match in _HTML_TR_RE.finditer(table_html):
             tr_html = tr_match.group("body")
 
-            title_match = re.search(
-                r"(?is)<td\b[^>]*class\s*=\s*['\"][^'\"]*\bt\b[^'\"]*['\"][^>]*>(?P<td>.*?)</td>",
-                tr_html,
-            )
+            title_match = _HTML_TITLE_TD_RE.search(tr_html)
             if title_match:
                 title_html = title_match.group("td")
-                b_match = re.search(r"(?is)<b\b[^>]*>(?P<t>.*?)</b>", title_html)
-                raw_title = self._html_text((b_match.group("t") if b_match else title_html) or "")
-                m = re.match(r"^([A-Z]{2,}\d+[A-Z0-9]*)\s*[-–]\s*(.+)$", raw_title, flags=re.I)
+                b_match = _HTML_B_RE.search(title_html)
+                raw_title = cls._html_text((b_match.group("t") if b_match else title_html) or "")
+                m = _DISCIPLINA_TITLE_RE.match(raw_title)
                 if m:
                     current_disc_codigo = m.group(1).strip().upper()
                     current_disc_nome = m.group(2).strip()
                 continue
 
             visible_cells: list[tuple[str, str]] = []
-            for td_match in re.finditer(r"(?is)<td\b(?P<attrs>[^>]*)>(?P<td>.*?)</td>", tr_html):
+            for td_match in _HTML_TD_RE.finditer(tr_html):
                 attrs = td_match.group("attrs") or ""
-                cls_match = re.search(r'(?is)\bclass\s*=\s*["\']([^"\']*)', attrs)
-                cls = (cls_match.group(1) if cls_match else "").lower()
-                if " dn" in f" {cls} ":
+                cls_match = _HTML_CLASS_ATTR_RE.search(attrs)
+                cell_cls = (cls_match.group(1) if cls_match else "").lower()
+                if " dn" in f" {cell_cls} ":
                     continue
-                visible_cells.append((self._html_text(td_match.group("td") or ""), cls))
+                visible_cells.append((cls._html_text(td_match.group("td") or ""), cell_cls))
 
             if not visible_cells:
                 continue
@@ -2237,55 +3166,43 @@ class UtfprScraperAsync:
             def _get(idx: int) -> str:
                 return visible_cells[idx][0].strip() if idx < len(visible_cells) else ""
 
-            rows.append(
-                {
-                    "disciplina_codigo": current_disc_codigo,
-                    "disciplina_nome": current_disc_nome,
-                    "turma_codigo": turma_codigo,
-                    "enquadramento": _get(1),
-                    "vagas_total": _get(2),
-                    "vagas_calouros": _get(3),
-                    "reserva": _get(4),
-                    "prioridade": _get(5),
-                    "horario_raw": _get(6),
-                    "professor": _get(7),
-                    "optativa": _get(8),
-                }
-            )
-
-        if rows:
-            logger.info("Tabela UTFPR legacy extraida via codigo-fonte HTML (%d linhas)", len(rows))
-        return rows
+            yield {
+                "disciplina_codigo": current_disc_codigo,
+                "disciplina_nome": current_disc_nome,
+                "turma_codigo": turma_codigo,
+                "enquadramento": _get(1),
+                "vagas_total": _get(2),
+                "vagas_calouros": _get(3),
+                "reserva": _get(4),
+                "prioridade": _get(5),
+                "horario_raw": _get(6),
+                "professor": _get(7),
+                "optativa": _get(8),
+            }
 
     async def _header_value(self, page: Page) -> tuple[str | None, str | None]:
-        for css in selectors.DISCIPLINA_HEADER_SELECTORS:
-            try:
-                text = ((await page.locator(css).first.text_content()) or "").strip()
-            except Exception:
-                continue
-            if not text:
+        # Uma ida ao navegador para todos os seletores; `locator.text_content()` por seletor
+        # ainda esperava o timeout inteiro em cada um que nao existia na pagina.
+        texts: Any = None
+        with contextlib.suppress(Exception):
+            texts = await self._evaluate_fast(page, _JS_FIRST_TEXTS, _DISCIPLINA_HEADER_SELECTORS)
+        if not isinstance(texts, list):
+            return (None, None)
+        for text in texts:
+            if not text or not isinstance(text, str):
                 continue
             match = selectors.DISCIPLINA_HEADER_RE.search(text)
             if match:
-                return (match.group("codigo").strip().upper(), match.group("nome").strip())
+                return (match.group("codigo").upper(), match.group("nome").strip())
         return (None, None)
 
     @staticmethod
     def _norm(text: str) -> str:
-        text = unicodedata.normalize("NFKD", (text or ""))
-        text = "".join(ch for ch in text if not unicodedata.combining(ch))
-        return " ".join(text.lower().split())
+        return _norm_text(text)
 
     @classmethod
     def _column_index_map(cls, headers: list[str]) -> dict[str, int]:
-        normalized = [cls._norm(h) for h in headers]
-        mapping: dict[str, int] = {}
-        for field, hints in selectors.COLUMN_HINTS.items():
-            for idx, head in enumerate(normalized):
-                if any(cls._norm(hint) in head for hint in hints):
-                    mapping[field] = idx
-                    break
-        return mapping
+        return dict(_column_index_map_cached(tuple(headers)))
 
     @staticmethod
     def _to_int(value: str | None) -> int | None:
@@ -2303,14 +3220,30 @@ class UtfprScraperAsync:
         for txt in context_texts:
             match = selectors.DISCIPLINA_HEADER_RE.search(txt)
             if match:
-                return (match.group("codigo").strip().upper(), match.group("nome").strip())
+                return (match.group("codigo").upper(), match.group("nome").strip())
         return (page_disciplina_codigo or "", page_disciplina_nome or "")
 
+    @staticmethod
+    def _parse_horarios_unique(raws: Iterable[str]) -> dict[str, list[HorarioSlot] | None]:
+        """Parseia cada `horario_raw` distinto uma unica vez (`None` quando invalido).
+
+        Muitas turmas repetem o mesmo horario; cada `Turma` recebe copia propria da lista.
+        """
+        parsed: dict[str, list[HorarioSlot] | None] = dict.fromkeys(
+            filter(None, map(str.strip, raws))
+        )
+        for raw in parsed:
+            try:
+                parsed[raw] = parse_horarios(raw)
+            except ValueError:
+                pass
+        return parsed
+
     def _rows_to_turmas(
         self,
         *,
         headers: list[str],
-        rows: list[list[str]],
+        rows: Sequence[Sequence[str]],
         context_texts: list[str],
         page_disciplina_codigo: str | None,
         page_disciplina_nome: str | None,
@@ -2324,41 +3257,48 @@ class UtfprScraperAsync:
             page_disciplina_codigo,
             page_disciplina_nome,
         )
+        turma_idx = mapping["turma_codigo"]
+        horario_idx = mapping["horario_raw"]
+        # Indices dos campos opcionais resolvidos uma vez, fora do laco por linha.
+        optional_idx = tuple(
+            mapping.get(field)
+            for field in ("professor", "vagas_total", "vagas_calouros", "status", "prioridade")
+        )
+        parsed = self._parse_horarios_unique(
+            row[horario_idx] for row in rows if horario_idx < len(row)
+        )
         turmas: list[Turma] = []
         for row in rows:
             try:
-                turma_codigo = row[mapping["turma_codigo"]].strip()
-                horario_raw = row[mapping["horario_raw"]].strip()
+                turma_codigo = row[turma_idx].strip()
+                horario_raw = row[horario_idx].strip()
             except Exception:
                 continue
             if not turma_codigo or not horario_raw:
                 continue
 
-            try:
-                horarios = parse_horarios(horario_raw)
-            except ValueError:
+            horarios = parsed.get(horario_raw)
+            if horarios is None:
                 logger.warning("Horario invalido ignorado: %s | turma=%s", horario_raw, turma_codigo)
                 continue
 
-            def _get(field: str) -> str | None:
-                idx = mapping.get(field)
-                if idx is None or idx >= len(row):
-                    return None
-                value = row[idx].strip()
-                return value or None
-
+            size = len(row)
+            professor, vagas_total, vagas_calouros, status, prioridade = [
+                (row[idx].strip() or None) if idx is not None and idx < size else None
+                for idx in optional_idx
+            ]
             turmas.append(
                 Turma(
                     disciplina_codigo=disc_codigo,
                     disciplina_nome=disc_nome,
                     turma_codigo=turma_codigo,
                     horario_raw=horario_raw,
-                    horarios=horarios,
-                    professor=_get("professor"),
-                    vagas_total=self._to_int(_get("vagas_total")),
-                    vagas_calouros=self._to_int(_get("vagas_calouros")),
-                    status=_get("status"),
-                    prioridade=_get("prioridade"),
+                    horarios=list(horarios),
+                    professor=professor,
+                    vagas_total=self._to_int(vagas_total),
+                    vagas_calouros=self._to_int(vagas_calouros),
+                    status=status,
+                    prioridade=prioridade,
                 )
             )
         return turmas
@@ -2370,6 +3310,7 @@ class UtfprScraperAsync:
             text = str(value or "").strip()
             return text or None
 
+        parsed = self._parse_horarios_unique(str(row.get("horario_raw", "")) for row in rows)
         turmas: list[Turma] = []
         for row in rows:
             turma_codigo = str(row.get("turma_codigo", "")).strip()
@@ -2379,9 +3320,8 @@ class UtfprScraperAsync:
             horario_raw = str(row.get("horario_raw", "")).strip()
             horarios = []
             if horario_raw:
-                try:
-                    horarios = parse_horarios(horario_raw)
-                except ValueError:
+                horarios = parsed.get(horario_raw)
+                if horarios is None:
                     logger.warning(
                         "Horario invalido ignorado (utfpr legacy): %s | turma=%s",
                         horario_raw,
@@ -2395,7 +3335,7 @@ class UtfprScraperAsync:
                     disciplina_nome=str(row.get("disciplina_nome", "")).strip(),
                     turma_codigo=turma_codigo,
                     horario_raw=horario_raw,
-                    horarios=horarios,
+                    horarios=list(horarios),
                     professor=_clean(row.get("professor")),
                     vagas_total=self._to_int(_clean(row.get("vagas_total"))),
                     vagas_calouros=self._to_int(_clean(row.get("vagas_calouros"))),
@@ -2407,122 +3347,530 @@ class UtfprScraperAsync:
 
     async def _click_next_page(self, ctx: PageLike, *, token: CancelToken | None = None) -> bool:
         self._check_cancel(token)
-        for css in selectors.PAGINATION_NEXT_SELECTORS:
+        # Uma unica chamada JS le a primeira linha da tabela, acha o primeiro candidato visivel
+        # e habilitado e ja clica nele. Seletores exclusivos do Playwright (ex.: `:has-text`)
+        # nao rodam no DOM e voltam em `unsupported`.
+        clicked: str | None = None
+        prev_first_row: str | None = None
+        fallback_selectors: list[str] = _PAGINATION_NEXT_SELECTORS
+        probed = False
+        with contextlib.suppress(Exception):
+            # Clica dentro do script: fica fora da sessao CDP para nunca rodar duas vezes.
+            probe = await ctx.evaluate(_JS_NEXT_PAGE_PROBE, _PAGINATION_NEXT_SELECTORS)
+            if isinstance(probe, dict):
+                probed = True
+                clicked = probe.get("clicked") or None
+                prev = probe.get("prevFirstRow")
+                prev_first_row = prev if isinstance(prev, str) else None
+                fallback_selectors = [str(css) for css in (probe.get("unsupported") or [])]
+
+        if clicked:
+            self._page_turn_kept_table = await self._after_next_page_click(
+                ctx, prev_first_row=prev_first_row, token=token
+            )
+            return True
+        if not probed:
+            prev_first_row = await self._table_first_row_text(ctx)
+
+        for css in fallback_selectors:
             try:
                 locator = ctx.locator(css).first
                 if await locator.count() == 0:
                     continue
-                if not await locator.is_visible():
+                # Visibilidade + desabilitado numa unica ida ao navegador.
+                if not await locator.evaluate(_JS_IS_CLICKABLE_NEXT):
                     continue
-                cls = ((await locator.get_attribute("class")) or "").lower()
-                aria_disabled = ((await locator.get_attribute("aria-disabled")) or "").lower()
-                if "disabled" in cls or aria_disabled in {"true", "1"}:
-                    continue
-                await locator.click()
-                await asyncio.sleep(0.2)
-                await self._wait_table_anchor(ctx, token=token)
-                return True
+                await locator.click(timeout=selectors.PROBE_CLICK_TIMEOUT_MS)
             except Exception:
                 continue
+            self._page_turn_kept_table = await self._after_next_page_click(
+                ctx, prev_first_row=prev_first_row, token=token
+            )
+            return True
         return False
 
+    async def _table_first_row_text(self, ctx: PageLike) -> str | None:
+        with contextlib.suppress(Exception):
+            text = await ctx.evaluate(f"() => {_JS_FIRST_DATA_ROW_TEXT}")
+            return text if isinstance(text, str) else None
+        return None
+
+    async def _after_next_page_click(
+        self,
+        ctx: PageLike,
+        *,
+        prev_first_row: str | None,
+        token: CancelToken | None = None,
+    ) -> bool:
+        """Espera a pagina seguinte no mesmo contexto; `False` se a tabela nao reapareceu nele."""
+        self._invalidate_frames_cache()
+        # Espera a primeira linha da tabela mudar em vez de um sleep fixo apos o clique.
+        if prev_first_row is not None:
+            await self._wait_first_row_changed(ctx, prev_first_row)
+        try:
+            await self._wait_table_anchor(ctx, token=token)
+        except CancelledError:
+            raise
+        except Exception:
+            # Frame trocado/desanexado: quem chamou re-resolve o contexto da tabela.
+            return False
+        return True
+
+    async def _wait_first_row_changed(self, ctx: PageLike, prev_first_row: str) -> None:
+        """Espera a primeira linha de dados mudar ou o frame da tabela navegar, o que vier antes."""
+        timeout_ms = min(self.timeout_ms, 4000)
+        frame = getattr(ctx, "main_frame", ctx)
+        page = getattr(frame, "page", None) or self.page
+        waits = [
+            asyncio.ensure_future(
+                ctx.wait_for_function(
+                    f"(prev) => ({_JS_FIRST_DATA_ROW_TEXT}) !== prev",
+                    arg=prev_first_row,
+                    timeout=timeout_ms,
+                )
+            )
+        ]
+        if page is not None:
+            # Paginacao por submit/link recarrega o documento: a navegacao ja responde.
+            waits.append(
+                asyncio.ensure_future(
+                    page.wait_for_event(
+                        "framenavigated", predicate=lambda f: f is frame, timeout=timeout_ms
+                    )
+                )
+            )
+        try:
+            await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for wait in waits:
+                wait.cancel()
+            # Consome timeouts/cancelamentos para nao virarem warning do loop.
+            await asyncio.gather(*waits, return_exceptions=True)
+
+    def _tables_to_turmas(
+        self,
+        tables: list[dict[str, Any]],
+        *,
+        page_disciplina_codigo: str | None,
+        page_disciplina_nome: str | None,
+        cache: dict[tuple[Any, ...], list[Turma]] | None = None,
+    ) -> list[Turma]:
+        """Converte as tabelas genericas extraidas de uma pagina em `Turma`.
+
+        Com `cache`, tabelas de conteudo identico (ex.: a mesma tabela repetida em todas as
+        paginas) sao convertidas uma unica vez por busca.
+        """
+        turmas: list[Turma] = []
+        for table in tables:
+            # O extrator ja devolve strings: so congela em tuplas (chave do cache), sem str() por
+            # celula.
+            headers = tuple(table.get("headers") or ())
+            raw_rows = table.get("rows") or []
+            # Caminho comum: todas as linhas ja sao listas e a tabela e congelada sem filtro.
+            if not all(isinstance(row, list) for row in raw_rows):
+                raw_rows = [row for row in raw_rows if isinstance(row, list)]
+            rows = tuple(map(tuple, raw_rows))
+            context_texts = tuple(
+                t for t in table.get("context_texts", ()) if isinstance(t, str)
+            )
+            key = (headers, rows, context_texts)
+            converted = cache.get(key) if cache is not None else None
+            if converted is None:
+                converted = self._rows_to_turmas(
+                    headers=list(headers),
+                    rows=rows,
+                    context_texts=list(context_texts),
+                    page_disciplina_codigo=page_disciplina_codigo,
+                    page_disciplina_nome=page_disciplina_nome,
+                )
+                if cache is not None:
+                    cache[key] = converted
+            turmas.extend(converted)
+        return turmas
+
+    async def _discover_pagination_urls(
+        self, ctx: PageLike, *, limit: int
+    ) -> tuple[list[str], int]:
+        """URLs das paginas seguintes pelos links numericos do paginador da tabela, se houver.
+
+        Considera so links perto da tabela de turmas e para o mesmo endereco (outros `page=` da
+        pagina ficam de fora). Devolve no maximo `limit` URLs e o maior numero listado.
+        """
+        script = """
+        (sels) => {
+          const here = new URL(location.href);
+          const table =
+            document.querySelector(MAIN_TABLE)
+            ?? document.querySelector("table > thead ~ tbody")?.closest("table");
+          if (!table) return [];
+          const collect = (root) => {
+            const seen = new Set([here.href.split("#")[0]]);
+            const out = [];
+            for (const css of sels) {
+              let links = [];
+              try { links = root.querySelectorAll(css); } catch (_) { continue; }
+              for (const a of links) {
+                const text = (a.textContent || "").trim();
+                if (!/^\\d+$/.test(text)) continue;
+                // Links dentro das linhas de turma nao sao do paginador.
+                if (table.contains(a) && a.closest("tr")?.querySelector("td.sl")) continue;
+                let url;
+                try { url = new URL(a.href, here); } catch (_) { continue; }
+                if (url.origin !== here.origin || url.pathname !== here.pathname) continue;
+                const href = url.href.split("#")[0];
+                if (seen.has(href)) continue;
+                seen.add(href);
+                out.push([Number(text), href]);
+              }
+            }
+            return out;
+          };
+          // Sobe no maximo tres niveis a partir da tabela: o primeiro com links e o paginador.
+          let scope = table;
+          for (let hops = 0; hops < 3 && scope.parentElement; hops++) {
+            scope = scope.parentElement;
+            const found = collect(scope);
+            if (found.length) return found;
+          }
+          return [];
+        }
+        """.replace("MAIN_TABLE", json.dumps(selectors.UTFPR_TURMAS_MAIN_TABLE_SELECTOR))
+        with contextlib.suppress(Exception):
+            links = await ctx.evaluate(script, list(selectors.PAGINATION_LINK_SELECTORS))
+            return self._consecutive_page_urls(links or [], limit=limit)
+        return ([], 0)
+
+    @staticmethod
+    def _consecutive_page_urls(
+        links: Iterable[Sequence[Any]], *, limit: int
+    ) -> tuple[list[str], int]:
+        """URLs das paginas 2, 3, ... enquanto a numeracao for continua, ate `limit` URLs.
+
+        Paginadores em janela (`1 2 3 4 5 ... 20 Proxima`) pulam numeros: a partir do salto
+        as paginas sao alcancadas pelo botao "proxima", nao por link direto. Por isso tambem
+        devolve o maior numero listado, que indica se ha paginas alem das URLs devolvidas.
+        """
+        by_number: dict[int, str] = {}
+        for number, href in links:
+            with contextlib.suppress(TypeError, ValueError):
+                by_number.setdefault(int(number), str(href))
+        urls: list[str] = []
+        number = 2
+        while number in by_number and len(urls) < limit:
+            urls.append(by_number[number])
+            number += 1
+        return (urls, max(by_number, default=0))
+
+    async def _resume_after_prefetch(
+        self,
+        ctx: PageLike,
+        last_url: str,
+        *,
+        token: CancelToken | None = None,
+    ) -> bool:
+        """Reabre no contexto da tabela a ultima pagina ja buscada e clica em "proxima" nela."""
+        self._check_cancel(token)
+        try:
+            await ctx.goto(last_url, wait_until="domcontentloaded", timeout=self.timeout_ms)
+            self._invalidate_frames_cache()
+            await self._wait_table_anchor(ctx, token=token)
+        except CancelledError:
+            raise
+        except Exception:
+            logger.warning(
+                "Nao foi possivel reabrir %s para seguir a paginacao", last_url, exc_info=True
+            )
+            return False
+        return await self._click_next_page(ctx, token=token)
+
+    async def _fetch_pages_concurrently(
+        self,
+        urls: list[str],
+        *,
+        token: CancelToken | None,
+        page_disciplina_codigo: str | None,
+        page_disciplina_nome: str | None,
+    ) -> list[list[Turma]]:
+        """Abre cada URL numa aba do mesmo contexto (mesma sessao), MAX_SCRAPER_WORKERS por vez."""
+        if self._context is None:
+            return []
+        semaphore = asyncio.Semaphore(selectors.MAX_SCRAPER_WORKERS)
+
+        async def _worker(url: str) -> list[Turma]:
+            async with semaphore:
+                self._check_cancel(token)
+                extra_page = await self._context.new_page()
+                try:
+                    await extra_page.goto(
+                        url, wait_until="domcontentloaded", timeout=self.timeout_ms
+                    )
+                    ctx = (await self._find_frame_with_table(extra_page, token=token)) or extra_page
+                    rows = await self._extract_utfpr_turmas_rows_fast(ctx)
+                    if not rows:
+                        rows = await self._extract_utfpr_turmas_rows_from_html_source(ctx)
+                    # Conversao (CPU) em thread para nao travar as outras abas no event loop.
+                    if rows:
+                        return await asyncio.to_thread(self._utfpr_table_rows_to_turmas, rows)
+                    return await asyncio.to_thread(
+                        self._tables_to_turmas,
+                        await self._extract_tables_fast(ctx),
+                        page_disciplina_codigo=page_disciplina_codigo,
+                        page_disciplina_nome=page_disciplina_nome,
+                    )
+                finally:
+                    with contextlib.suppress(Exception):
+                        await asyncio.wait_for(extra_page.close(), timeout=1.5)
+
+        # TaskGroup: uma falha/cancelamento derruba as demais abas em vez de deixa-las rodando.
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tasks = [tg.create_task(_worker(url)) for url in urls]
+        except ExceptionGroup as group:
+            # Mantem o contrato de excecoes simples (ScraperError, CancelledError...) para quem
+            # chama. Cancelamento e layout mudado vencem um timeout generico de outra aba, para
+            # o erro visto nao depender da ordem das tarefas.
+            def _priority(exc: BaseException) -> int:
+                if isinstance(exc, CancelledError):
+                    return 0
+                return 1 if isinstance(exc, SelectorChangedError) else 2
+
+            error = min(group.exceptions, key=_priority)
+            for other in group.exceptions:
+                if other is not error:
+                    logger.debug("Falha adicional ao buscar pagina em paralelo", exc_info=other)
+            raise error from None
+        return [task.result() for task in tasks]
+
+    async def _extract_page_rows(
+        self,
+        ctx: PageLike,
+        order: tuple[str, ...],
+    ) -> tuple[str, list[dict[str, Any]], list[dict[str, Any]], tuple[Any, ...]]:
+        """Roda os extratores na ordem dada.
+
+        Devolve `(estrategia, linhas_utfpr, tabelas, assinatura)`.
+
+        A assinatura (sem a URL) identifica a pagina para detectar repeticao; `estrategia`
+        vazia indica que nenhum extrator achou linhas.
+        """
+        def _tables_signature(tables: list[dict[str, Any]]) -> tuple[Any, ...]:
+            return (sum(len(t.get("rows", ())) for t in tables),)
+
+        tables_tried = False
+        for strategy in order:
+            if strategy == "tables":
+                if tables_tried:
+                    continue
+                tables = await self._extract_tables_fast(ctx)
+                if tables:
+                    return (strategy, [], tables, _tables_signature(tables))
+                continue
+            if strategy == "utfpr_html":
+                rows = await self._extract_utfpr_turmas_rows_from_html_source(ctx)
+            else:
+                # Sem linhas legacy, a mesma chamada ja trouxe as tabelas genericas.
+                extracted = await self._extract_any_fast(ctx)
+                rows = []
+                if extracted is not None:
+                    kind, data = extracted
+                    if kind == "tables":
+                        tables_tried = True
+                        if data:
+                            return (kind, [], data, _tables_signature(data))
+                    else:
+                        rows = data
+            if rows:
+                # Impressao digital de todas as linhas (nao so primeira/ultima): paginas que so
+                # diferem no meio nao sao tomadas por repetidas.
+                fingerprint = hash(
+                    tuple(
+                        (row.get("disciplina_codigo", ""), row.get("turma_codigo", ""))
+                        for row in rows
+                    )
+                )
+                return (strategy, rows, [], ("utfpr", len(rows), fingerprint))
+        return ("", [], [], ())
+
     async def fetch_turmas_abertas(
         self,
         *,
         token: CancelToken | None = None,
         max_pages: int = 50,
     ) -> list[Turma]:
+        turmas = [
+            turma async for turma in self.iter_turmas_abertas(token=token, max_pages=max_pages)
+        ]
+        turmas.sort(key=_TURMA_SORT_KEY)
+        return turmas
+
+    async def iter_turmas_abertas(
+        self,
+        *,
+        token: CancelToken | None = None,
+        max_pages: int = 50,
+    ) -> AsyncIterator[Turma]:
+        """Percorre as paginas de Turmas Abertas, entregando cada turma nova assim que lida.
+
+        Turmas repetidas (mesmo `uid()`) sao entregues uma unica vez e vale a primeira
+        ocorrencia: uma turma ja entregue nao pode ser substituida por uma pagina posterior.
+        `fetch_turmas_abertas` coleta e ordena; quem consome pode comecar a processar ja na
+        primeira pagina.
+        """
         page = self._ensure_page()
         ctx = self._active_table_context or page
         self._check_cancel(token)
+        # O cancelamento imediato so fica armado durante os awaits deste gerador, nunca
+        # entre um `yield` e o proximo `__anext__`.
+        armed = functools.partial(self._cancel_current_task_on, token)
+
+        seen_uids: set[str] = set()
+        # Assinatura por tupla: hash de poucos campos, sem montar string a cada pagina.
+        visited_signatures: set[tuple[Any, ...]] = set()
+        table_cache: dict[tuple[Any, ...], list[Turma]] = {}
+        extract_order = _PAGE_EXTRACT_ORDER
+        ctx_url = getattr(ctx, "url", page.url)
+        with armed():
+            page_disciplina_codigo, page_disciplina_nome = await self._header_value(page)
+        # Logs por pagina so quando INFO esta habilitado (nivel resolvido uma vez).
+        log_info = logger.isEnabledFor(logging.INFO)
+
+        def _new_turmas(turmas_pagina: list[Turma], page_label: object) -> Iterator[Turma]:
+            # Filtra e entrega na mesma passada, sem montar uma lista de novas por pagina.
+            novas = 0
+            for turma in turmas_pagina:
+                uid = turma.uid()
+                if uid not in seen_uids:
+                    seen_uids.add(uid)
+                    novas += 1
+                    yield turma
+            if log_info:
+                logger.info(
+                    "Pagina %s processada: %d turmas (%d novas)",
+                    page_label,
+                    len(turmas_pagina),
+                    novas,
+                )
 
-        all_turmas: dict[str, Turma] = {}
-        visited_signatures: set[str] = set()
-        page_disciplina_codigo, page_disciplina_nome = await self._header_value(page)
-
-        for page_num in range(1, max_pages + 1):
-            self._check_cancel(token)
-
-            # O parser por HTML (frame.content + regex leve) tem se mostrado mais estável
-            # no portal legacy da UTFPR. Se não encontrar linhas, tenta JS.
-            utfpr_rows = await self._extract_utfpr_turmas_rows_from_html_source(ctx)
-            if not utfpr_rows:
-                utfpr_rows = await self._extract_utfpr_turmas_rows_fast(ctx)
-            tables: list[dict[str, Any]] = []
-            if utfpr_rows:
-                signature = (
-                    f"{getattr(ctx, 'url', page.url)}|utfpr|{len(utfpr_rows)}|"
-                    f"{utfpr_rows[0].get('disciplina_codigo', '')}|"
-                    f"{utfpr_rows[-1].get('turma_codigo', '')}"
+        async def _read_page(page_num: int) -> Callable[[], list[Turma]] | None:
+            """Extrai as linhas da pagina atual; None se ela repete uma pagina ja vista."""
+            nonlocal extract_order
+            with armed():
+                strategy, utfpr_rows, tables, page_signature = await self._extract_page_rows(
+                    ctx, extract_order
                 )
-            else:
-                tables = await self._extract_tables_fast(ctx)
-                if not tables:
+                if not strategy:
                     await self._save_debug_artifacts("turmas_sem_tabela")
                     raise SelectorChangedError(
                         "Nenhuma tabela com linhas encontrada em Turmas Abertas. "
                         "Ajuste src/infra/selectors.py."
                     )
-                signature = (
-                    f"{getattr(ctx, 'url', page.url)}|"
-                    f"{sum(len(t.get('rows', [])) for t in tables)}"
-                )
-
+            # Paginas seguintes comecam pelo extrator que funcionou nesta.
+            extract_order = (strategy, *(k for k in _PAGE_EXTRACT_ORDER if k != strategy))
+            signature = (ctx_url, *page_signature)
             if signature in visited_signatures:
                 logger.info("Pagina repetida detectada; encerrando iteracao")
-                break
+                return None
             visited_signatures.add(signature)
 
-            added_this_page = 0
-            if utfpr_rows:
+            if utfpr_rows and log_info:
                 logger.info(
                     "Pagina %d: extrator UTFPR especifico encontrou %d linhas",
                     page_num,
                     len(utfpr_rows),
                 )
-                turmas_pagina = self._utfpr_table_rows_to_turmas(utfpr_rows)
-                for turma in turmas_pagina:
-                    all_turmas[turma.uid()] = turma
-                    added_this_page += 1
-            else:
-                for table in tables:
-                    headers = [str(h) for h in table.get("headers", [])]
-                    rows = [
-                        [str(c) for c in row]
-                        for row in table.get("rows", [])
-                        if isinstance(row, list)
-                    ]
-                    context_texts = [
-                        str(t) for t in table.get("context_texts", []) if isinstance(t, str)
-                    ]
-                    turmas = self._rows_to_turmas(
-                        headers=headers,
-                        rows=rows,
-                        context_texts=context_texts,
-                        page_disciplina_codigo=page_disciplina_codigo,
-                        page_disciplina_nome=page_disciplina_nome,
-                    )
-                    for turma in turmas:
-                        all_turmas[turma.uid()] = turma
-                        added_this_page += 1
-            logger.info("Pagina %d processada: %d turmas", page_num, added_this_page)
 
+            def _convert_page() -> list[Turma]:
+                if utfpr_rows:
+                    return self._utfpr_table_rows_to_turmas(utfpr_rows)
+                return self._tables_to_turmas(
+                    tables,
+                    page_disciplina_codigo=page_disciplina_codigo,
+                    page_disciplina_nome=page_disciplina_nome,
+                    cache=table_cache,
+                )
+
+            return _convert_page
+
+        async def _follow_table() -> None:
+            nonlocal ctx, ctx_url
+            # Após paginar, pode trocar o frame. Se a tabela reapareceu no mesmo contexto
+            # (caso comum) nao ha o que re-resolver; senao confirma antes do polling por frame.
+            if not self._page_turn_kept_table:
+                with armed():
+                    if not await self._ctx_still_shows_table(ctx):
+                        ctx = (await self._find_frame_with_table(page, token=token)) or page
+            ctx_url = getattr(ctx, "url", page.url)
+            self._active_table_context = ctx
+
+        start_page = 1
+        has_next = True
+        page_urls: list[str] = []
+        if max_pages > 1:
+            with armed():
+                page_urls, last_listed = await self._discover_pagination_urls(
+                    ctx, limit=max_pages - 1
+                )
+        if page_urls:
+            # Links reais do paginador: busca essas paginas em paralelo; o laco abaixo segue
+            # pelo "proxima" so se o paginador (em janela) listar paginas alem delas.
+            convert_first = await _read_page(1)
+            for turma in _new_turmas(convert_first(), 1):
+                yield turma
+            logger.info(
+                "Paginacao por links detectada; buscando %d paginas em paralelo",
+                len(page_urls),
+            )
+            with armed():
+                extra_pages = await self._fetch_pages_concurrently(
+                    page_urls,
+                    token=token,
+                    page_disciplina_codigo=page_disciplina_codigo,
+                    page_disciplina_nome=page_disciplina_nome,
+                )
+            for extra_num, turmas_pagina in enumerate(extra_pages, start=2):
+                for turma in _new_turmas(turmas_pagina, extra_num):
+                    yield turma
+            start_page = 2 + len(page_urls)
+            has_next = last_listed >= start_page
+            if has_next and start_page <= max_pages:
+                with armed():
+                    has_next = await self._resume_after_prefetch(ctx, page_urls[-1], token=token)
+                if has_next:
+                    await _follow_table()
+
+        for page_num in range(start_page, max_pages + 1):
+            if not has_next:
+                break
             self._check_cancel(token)
-            if not await self._click_next_page(ctx, token=token):
+            convert_page = await _read_page(page_num)
+            if convert_page is None:
                 break
-            # Após paginar, pode trocar o frame. Re-resolve para robustez.
-            ctx = (await self._find_frame_with_table(page, token=token)) or page
-            self._active_table_context = ctx
+            # Pipeline: as linhas ja foram extraidas, entao a conversao em `Turma` (CPU, em
+            # thread) roda enquanto o navegador carrega a proxima pagina.
+            with armed():
+                turmas_pagina, has_next = await asyncio.gather(
+                    asyncio.to_thread(convert_page),
+                    self._click_next_page(ctx, token=token),
+                )
+            for turma in _new_turmas(turmas_pagina, page_num):
+                yield turma
+            if has_next:
+                await _follow_table()
         else:
-            logger.warning("Paginacao interrompida apos %d paginas (limite de seguranca)", max_pages)
+            # Sem `break`: so avisa se ainda havia pagina seguinte ao atingir o limite.
+            if has_next:
+                logger.warning(
+                    "Paginacao interrompida apos %d paginas (limite de seguranca)", max_pages
+                )
 
-        if not all_turmas:
-            await self._save_debug_artifacts("turmas_parse_vazio")
+        if not seen_uids:
+            with armed():
+                await self._save_debug_artifacts("turmas_parse_vazio")
             raise SelectorChangedError(
                 "Tabela encontrada, mas nao foi possivel mapear colunas de turma/horario. "
                 "Ajuste COLUMN_HINTS em src/infra/selectors.py."
             )
 
-        await self._persist_storage_state()
-        return sorted(all_turmas.values(), key=lambda t: (t.disciplina_codigo, t.disciplina_nome, t.turma_codigo))
+        # Gravacao do storage state sai do caminho critico; `close()` espera ela terminar.
+        self._pending_persist = self._spawn_background(self._persist_storage_state())
 
@@ -27,6 +27,8 @@ MANUAL_STEP_KEYWORDS = (
     "autenticacao",
     "autenticação",
 )
+# Alternacao unica (regex JS/Python compativel) para testar todas as palavras numa passada.
+MANUAL_STEP_PATTERN = "|".join(re.escape(k) for k in MANUAL_STEP_KEYWORDS)
 
 # Seleção de campus antes do login (página inicial do sistemas2)
 DEFAULT_CAMPUS_NAME = "Curitiba"
@@ -75,6 +77,10 @@ PORTAL_TURMAS_PAGE_KEYWORDS = (
     "relação de turmas abertas para a matrícula",
     "relacao de turmas abertas para a matricula",
 )
+# Alternacao unica das palavras acima; espacos viram `\s+` para casar o texto cru do body.
+PORTAL_TURMAS_PAGE_PATTERN = "|".join(
+    r"\s+".join(re.escape(word) for word in k.split()) for k in PORTAL_TURMAS_PAGE_KEYWORDS
+)
 TURMAS_ABERTAS_DIRECT_PATHS = (
     "mplistahorario.inicio",
     "mplistahorario.psInicio",
@@ -112,6 +118,12 @@ PAGINATION_NEXT_SELECTORS = (
     ".pagination a:has-text('>')",
     ".pagination a:has-text('Próxima')",
 )
+# Links numericos do paginador com URL propria (permitem buscar paginas em paralelo).
+PAGINATION_LINK_SELECTORS = (
+    ".pagination a[href]",
+    "a[href*='pagina=']",
+    "a[href*='page=']",
+)
 
 DISCIPLINA_HEADER_SELECTORS = ("h1", "h2", ".titulo", ".page-title", ".panel-title", "b")
 DISCIPLINA_HEADER_RE = re.compile(
@@ -132,4 +144,17 @@ COLUMN_HINTS: dict[str, tuple[str, ...]] = {
 # Timeouts / retry
 DEFAULT_TIMEOUT_MS = 8000
 STEP_RETRIES = 2
-RETRY_BACKOFF_MS = 400
+RETRY_BASE_MS = 400
+RETRY_MAX_MS = 8000
+# Teto de cliques/preenchimentos especulativos (fallbacks): sem alvo, falha rapido em vez de
+# esperar o timeout padrao da sessao.
+PROBE_CLICK_TIMEOUT_MS = 2500
+
+# Abas simultaneas ao buscar paginas pelos links do paginador
+MAX_SCRAPER_WORKERS = 2
+
+# Storage state: regrava mesmo sem mudanca de cookies depois deste intervalo
+STORAGE_STATE_MAX_AGE_S = 300
+
+# Artefatos de debug em erro: teto do HTML salvo (caracteres)
+DEBUG_HTML_MAX_CHARS = 262_144
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import hashlib
 
 from PySide6.QtCore import QPoint, QRectF, Qt, Signal
@@ -18,9 +19,47 @@ from src.core.models import ScheduleBuildResult, Turma
 from src.core.schedule import DIA_LABELS_LONG
 
 
+@functools.lru_cache(maxsize=256)
+def _uid_color(uid: str) -> QColor:
+    # Mesmo MD5 de export_png._hash_color: a grade na tela e o PNG exportado mantem as cores.
+    # O cache evita refazer o hash a cada paintEvent para as mesmas turmas.
+    md5 = hashlib.md5(uid.encode("utf-8")).hexdigest()
+    rgb = [int(md5[i : i + 2], 16) for i in (0, 2, 4)]
+    rgb = [min(220, max(65, v)) for v in rgb]
+    return QColor(rgb[0], rgb[1], rgb[2])
+
+
 class ScheduleGridWidget(QWidget):
     """Widget de desenho da grade (rápido e independente de screenshots)."""
 
+    # Cores/canetas fixas criadas uma vez, nao a cada paintEvent.
+    _COLOR_BG = QColor("#111827")
+    _COLOR_HEAD = QColor("#1D4ED8")
+    _COLOR_ROW_LABEL = QColor("#0F172A")
+    _COLOR_ROW_EVEN = QColor("#EAF0F7")
+    _COLOR_ROW_ODD = QColor("#EDF3FA")
+    _PEN_GRID = QPen(QColor("#334155"))
+    _PEN_CONFLICT = QPen(QColor("#EF4444"), 2)
+    _PEN_CELL = QPen(QColor("#94A3B8"))
+    _DAYS = (2, 3, 4, 5, 6, 7)
+    _ROW_LABELS = (
+        *(f"M{i}" for i in range(1, 7)),
+        *(f"T{i}" for i in range(1, 7)),
+        *(f"N{i}" for i in range(1, 6)),
+    )
+    # Fontes so depois do QApplication existir: criadas no primeiro paint e reaproveitadas.
+    _fonts: tuple[QFont, QFont, QFont] | None = None
+
+    @classmethod
+    def _paint_fonts(cls) -> tuple[QFont, QFont, QFont]:
+        if cls._fonts is None:
+            cls._fonts = (
+                QFont("Segoe UI", 9, QFont.Bold),
+                QFont("Segoe UI", 9, QFont.Bold),
+                QFont("Segoe UI", 7, QFont.Bold),
+            )
+        return cls._fonts
+
     def __init__(self) -> None:
         super().__init__()
         self.setMouseTracking(True)
@@ -32,10 +71,7 @@ class ScheduleGridWidget(QWidget):
         self.update()
 
     def _color_for_uid(self, uid: str) -> QColor:
-        md5 = hashlib.md5(uid.encode("utf-8")).hexdigest()
-        rgb = [int(md5[i : i + 2], 16) for i in (0, 2, 4)]
-        rgb = [min(220, max(65, v)) for v in rgb]
-        return QColor(rgb[0], rgb[1], rgb[2])
+        return _uid_color(uid)
 
     def _cell_text(self, cell_turmas: list[Turma]) -> str:
         if not cell_turmas:
@@ -51,59 +87,55 @@ class ScheduleGridWidget(QWidget):
         p.setRenderHint(QPainter.Antialiasing, False)
 
         rect = self.rect()
-        p.fillRect(rect, QColor("#111827"))
+        p.fillRect(rect, self._COLOR_BG)
 
         margin = 8
         left_w = 80
         head_h = 40
-        days = [2, 3, 4, 5, 6, 7]
-        row_labels = [*(f"M{i}" for i in range(1, 7)), *(f"T{i}" for i in range(1, 7)), *(f"N{i}" for i in range(1, 6))]
+        days = self._DAYS
+        row_labels = self._ROW_LABELS
         grid_w = max(10, rect.width() - 2 * margin)
         grid_h = max(10, rect.height() - 2 * margin)
         cell_w = (grid_w - left_w) / 6
         cell_h = (grid_h - head_h) / len(row_labels)
 
-        pen_grid = QPen(QColor("#334155"))
-        pen_conflict = QPen(QColor("#EF4444"))
-        pen_conflict.setWidth(2)
-        pen_cell = QPen(QColor("#94A3B8"))
-
-        font_head = QFont("Segoe UI", 9, QFont.Bold)
-        font_row = QFont("Segoe UI", 9, QFont.Bold)
-        font_cell = QFont("Segoe UI", 7, QFont.Bold)
-        p.setPen(Qt.white)
-
+        pen_grid = self._PEN_GRID
+        pen_conflict = self._PEN_CONFLICT
+        pen_cell = self._PEN_CELL
+        font_head, font_row, font_cell = self._paint_fonts()
         self._cell_info = []
 
-        # Cabeçalhos
-        for i, day in enumerate(days):
-            x = margin + left_w + i * cell_w
-            r = QRectF(x, margin, cell_w, head_h)
-            p.fillRect(r, QColor("#1D4ED8"))
-            p.setPen(Qt.NoPen)
-            p.drawRect(r)
-            p.setPen(Qt.white)
-            p.setFont(font_head)
-            p.drawText(r, Qt.AlignCenter, DIA_LABELS_LONG[day])
+        # Geometria e conteudo primeiro; o desenho vem depois em passadas agrupadas por estado
+        # do QPainter (caneta/fonte), em vez de trocar caneta e fonte a cada celula.
+        head_rects = [
+            QRectF(margin + left_w + i * cell_w, margin, cell_w, head_h) for i in range(len(days))
+        ]
+        label_rects: list[QRectF] = []
+        row_fills: list[tuple[QColor, list[QRectF]]] = [
+            (self._COLOR_ROW_EVEN, []),
+            (self._COLOR_ROW_ODD, []),
+        ]
+        cell_rects: list[QRectF] = []
+        # rgb -> (cor, retangulos preenchidos, contornos na propria cor); conflitos usam outra
+        # caneta.
+        fills: dict[int, tuple[QColor, list[QRectF], list[QRectF]]] = {}
+        conflict_rects: list[QRectF] = []
+        cell_texts: list[tuple[QRectF, str]] = []
 
-        # Linhas + células
         for row_idx, label in enumerate(row_labels):
             y = margin + head_h + row_idx * cell_h
-            rr = QRectF(margin, y, left_w, cell_h)
-            p.fillRect(rr, QColor("#0F172A"))
-            p.setPen(Qt.white)
-            p.setFont(font_row)
-            p.drawText(rr, Qt.AlignCenter, label)
+            label_rects.append(QRectF(margin, y, left_w, cell_h))
             period = label[0]
             slot_num = int(label[1:])
+            row_cells = row_fills[row_idx % 2][1]
+            slots = self._result.grid.get(period, {}).get(slot_num, {})
 
             for day_index in range(6):
                 x = margin + left_w + day_index * cell_w
                 cr = QRectF(x, y, cell_w, cell_h)
-                p.fillRect(cr, QColor("#EAF0F7") if row_idx % 2 == 0 else QColor("#EDF3FA"))
-                p.setPen(pen_cell)
-                p.drawRect(cr)
-                cell_turmas = self._result.grid.get(period, {}).get(slot_num, {}).get(day_index, [])
+                row_cells.append(cr)
+                cell_rects.append(cr)
+                cell_turmas = slots.get(day_index, [])
                 if not cell_turmas:
                     continue
 
@@ -111,19 +143,50 @@ class ScheduleGridWidget(QWidget):
                 conflict = len(unique) > 1
                 fill = self._color_for_uid(cell_turmas[0].uid())
                 inner = cr.adjusted(2, 2, -2, -2)
-                p.fillRect(inner, fill)
-                p.setPen(pen_conflict if conflict else QPen(fill))
-                p.drawRect(inner)
-                p.setPen(Qt.white)
-                p.setFont(font_cell)
-                txt = self._cell_text(cell_turmas)
-                p.drawText(inner.adjusted(4, 2, -4, -2), Qt.AlignCenter | Qt.TextWordWrap, txt)
+                _color, fill_rects, outline_rects = fills.setdefault(fill.rgb(), (fill, [], []))
+                fill_rects.append(inner)
+                (conflict_rects if conflict else outline_rects).append(inner)
+                cell_texts.append((inner.adjusted(4, 2, -4, -2), self._cell_text(cell_turmas)))
                 tooltip_lines = [f"{t.disciplina_codigo} - {t.turma_codigo}" for t in cell_turmas]
                 if conflict:
                     tooltip_lines.append("")
                     tooltip_lines.append("CONFLITO DETECTADO")
                 self._cell_info.append((inner, "\n".join(tooltip_lines)))
 
+        # Fundos (fillRect nao depende da caneta).
+        for r in head_rects:
+            p.fillRect(r, self._COLOR_HEAD)
+        for r in label_rects:
+            p.fillRect(r, self._COLOR_ROW_LABEL)
+        for color, rects in row_fills:
+            for r in rects:
+                p.fillRect(r, color)
+        p.setPen(pen_cell)
+        p.drawRects(cell_rects)
+
+        # Celulas ocupadas: uma troca de caneta por cor, nao por celula.
+        for color, fill_rects, outline_rects in fills.values():
+            for r in fill_rects:
+                p.fillRect(r, color)
+            if outline_rects:
+                p.setPen(QPen(color))
+                p.drawRects(outline_rects)
+        if conflict_rects:
+            p.setPen(pen_conflict)
+            p.drawRects(conflict_rects)
+
+        # Textos: caneta branca uma vez, uma troca de fonte por grupo.
+        p.setPen(Qt.white)
+        p.setFont(font_head)
+        for r, day in zip(head_rects, days):
+            p.drawText(r, Qt.AlignCenter, DIA_LABELS_LONG[day])
+        p.setFont(font_row)
+        for r, label in zip(label_rects, row_labels):
+            p.drawText(r, Qt.AlignCenter, label)
+        p.setFont(font_cell)
+        for r, txt in cell_texts:
+            p.drawText(r, Qt.AlignCenter | Qt.TextWordWrap, txt)
+
         p.setPen(pen_grid)
         p.drawRect(QRectF(margin, margin, grid_w, grid_h))
         p.end()
@@ -122,7 +122,7 @@ class ScrapeWorker(QObject):
         asyncio.set_event_loop(loop)
         try:
             loop.run_until_complete(coro_factory(token))
-        except CancelledError:
+        except (CancelledError, asyncio.CancelledError):
             self._emit_progress(AppStatus.CANCELED, "Operacao cancelada.")
         except SelectorChangedError as exc:
             self.error.emit(
@@ -135,6 +135,14 @@ class ScrapeWorker(QObject):
             logger.exception("Falha inesperada no worker")
             self.error.emit(f"Erro inesperado no worker: {exc}")
         finally:
+            with self._lock:
+                scraper = self._scraper
+            if scraper is not None and token.is_cancelled():
+                # A task condutora pode ter sido cancelada no meio de um await; fecha o navegador
+                # antes de cancelar o restante. O force_close agendado pelo token espera o mesmo
+                # fechamento (`close()` e compartilhado), sem fechar duas vezes.
+                with contextlib.suppress(Exception, asyncio.CancelledError):
+                    loop.run_until_complete(scraper.force_close())
             with contextlib.suppress(Exception):
                 pending = [t for t in asyncio.all_tasks(loop) if not t.done()]
                 for t in pending:
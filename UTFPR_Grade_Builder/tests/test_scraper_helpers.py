@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from src.infra import scraper_async, selectors
+from src.infra.scraper_async import ScraperError, SelectorChangedError, UtfprScraperAsync
+
+
+def test_retry_backoff_ms_cresce_ate_o_teto_com_jitter(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Jitter no extremo superior: o valor fica exatamente em 1.5x o backoff truncado.
+    monkeypatch.setattr(scraper_async.random, "uniform", lambda low, high: high)
+    for attempt in range(12):
+        expected = min(selectors.RETRY_MAX_MS, selectors.RETRY_BASE_MS * (2**attempt))
+        assert UtfprScraperAsync._retry_backoff_ms(attempt) == pytest.approx(expected * 1.5)
+
+    monkeypatch.setattr(scraper_async.random, "uniform", lambda low, high: low)
+    assert UtfprScraperAsync._retry_backoff_ms(30) == pytest.approx(selectors.RETRY_MAX_MS * 0.5)
+
+
+def _run_retry(exc: Exception, retries: int = 2) -> int:
+    scraper = UtfprScraperAsync(retries=retries)
+    calls = 0
+
+    async def _failing():
+        nonlocal calls
+        calls += 1
+        raise exc
+
+    with pytest.raises(type(exc)):
+        asyncio.run(scraper._retry("op", _failing))
+    return calls
+
+
+def test_retry_repete_erro_transitorio(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(UtfprScraperAsync, "_retry_backoff_ms", staticmethod(lambda attempt: 0.0))
+    assert _run_retry(ScraperError("instavel"), retries=2) == 3
+
+
+def test_retry_nao_repete_selector_changed_error() -> None:
+    assert _run_retry(SelectorChangedError("layout mudou"), retries=2) == 1
+
+
+def test_parse_horarios_unique_parseia_cada_horario_uma_vez() -> None:
+    parsed = UtfprScraperAsync._parse_horarios_unique(["2M1", " 2M1 ", "", "xx", "3T2"])
+    assert list(parsed) == ["2M1", "xx", "3T2"]
+    assert [slot.codigo for slot in parsed["2M1"]] == ["2M1"]
+    assert parsed["xx"] is None
+
+
+def test_tables_to_turmas_converte_tabela_repetida_uma_vez(monkeypatch: pytest.MonkeyPatch) -> None:
+    scraper = UtfprScraperAsync()
+    table = {
+        "headers": ["Turma", "Horário", "Professor"],
+        "rows": [["S01", "2M1", "Fulano"], "linha invalida", ["S02", "3M1", "Beltrano"]],
+        "context_texts": ["ELT73B - Eletronica Digital"],
+    }
+    conversions = 0
+    original = scraper._rows_to_turmas
+
+    def _counting(**kwargs):
+        nonlocal conversions
+        conversions += 1
+        return original(**kwargs)
+
+    monkeypatch.setattr(scraper, "_rows_to_turmas", _counting)
+    cache: dict = {}
+    first = scraper._tables_to_turmas(
+        [table], page_disciplina_codigo=None, page_disciplina_nome=None, cache=cache
+    )
+    second = scraper._tables_to_turmas(
+        [dict(table)], page_disciplina_codigo=None, page_disciplina_nome=None, cache=cache
+    )
+
+    assert conversions == 1
+    # Linha que nao e lista e ignorada, como no parser original.
+    assert [t.turma_codigo for t in first] == ["S01", "S02"]
+    assert [t.uid() for t in second] == [t.uid() for t in first]
+
+
+class _FakeContext:
+    def __init__(self) -> None:
+        self.cookies_value = [{"name": "sid", "domain": "utfpr", "path": "/", "value": "1"}]
+        self.state_reads = 0
+
+    async def cookies(self):
+        return self.cookies_value
+
+    async def storage_state(self):
+        self.state_reads += 1
+        return {"cookies": self.cookies_value, "origins": []}
+
+
+def test_persist_storage_state_pula_gravacao_sem_mudanca_e_regrava_apos_max_age(tmp_path) -> None:
+    path = tmp_path / "state" / "storage.json"
+    scraper = UtfprScraperAsync(storage_state_path=path)
+    context = _FakeContext()
+    scraper._context = context
+
+    asyncio.run(scraper._persist_storage_state())
+    assert json.loads(path.read_text(encoding="utf-8"))["cookies"][0]["value"] == "1"
+    assert not path.with_name(path.name + ".tmp").exists()
+
+    # Mesmos cookies e gravacao recente: nem le o storage state.
+    asyncio.run(scraper._persist_storage_state())
+    assert context.state_reads == 1
+
+    # Mesmos cookies, mas a ultima gravacao passou do teto: regrava.
+    scraper._last_state_persist_monotonic -= selectors.STORAGE_STATE_MAX_AGE_S + 1
+    asyncio.run(scraper._persist_storage_state())
+    assert context.state_reads == 2
+
+    context.cookies_value = [{"name": "sid", "domain": "utfpr", "path": "/", "value": "2"}]
+    asyncio.run(scraper._persist_storage_state())
+    assert context.state_reads == 3
+    assert json.loads(path.read_text(encoding="utf-8"))["cookies"][0]["value"] == "2"
+
+
+class _FakeCdp:
+    def __init__(self, response: dict | None = None) -> None:
+        self.response = response
+        self.sent: list[dict] = []
+
+    async def send(self, method, params):
+        self.sent.append(params)
+        if self.response is None:
+            raise RuntimeError("Target page, context or browser has been closed")
+        return self.response
+
+
+class _FakeEvalPage:
+    def __init__(self) -> None:
+        self.evaluated: list[str] = []
+
+    async def evaluate(self, script, arg=None):
+        self.evaluated.append(script)
+        return "playwright"
+
+
+def test_evaluate_fast_so_cai_para_o_playwright_quando_o_envio_cdp_falha() -> None:
+    scraper = UtfprScraperAsync()
+    page = _FakeEvalPage()
+    cdp = _FakeCdp()
+    scraper._cdp, scraper._cdp_page = cdp, page
+
+    assert asyncio.run(scraper._evaluate_fast(page, "() => 1")) == "playwright"
+    assert cdp.sent[0]["awaitPromise"] is False
+    # Sessao perdida: as proximas chamadas nem tentam o CDP.
+    assert scraper._cdp is None
+    asyncio.run(scraper._evaluate_fast(page, "() => 1"))
+    assert len(cdp.sent) == 1
+
+
+def test_evaluate_fast_nao_reexecuta_script_que_falhou_via_cdp() -> None:
+    scraper = UtfprScraperAsync()
+    page = _FakeEvalPage()
+    scraper._cdp = _FakeCdp({"exceptionDetails": {"text": "Uncaught", "exception": {}}})
+    scraper._cdp_page = page
+
+    with pytest.raises(ScraperError, match="Uncaught"):
+        asyncio.run(scraper._evaluate_fast(page, "() => { throw new Error('x'); }"))
+    assert page.evaluated == []
+
+
+def test_falha_de_task_em_segundo_plano_e_registrada(caplog: pytest.LogCaptureFixture) -> None:
+    scraper = UtfprScraperAsync()
+
+    async def _falha() -> None:
+        raise OSError("disco cheio")
+
+    async def _run() -> None:
+        scraper._pending_persist = scraper._spawn_background(_falha())
+        await asyncio.sleep(0)
+        await scraper.close()
+
+    with caplog.at_level("WARNING"):
+        asyncio.run(_run())
+
+    assert "disco cheio" in caplog.text
+    assert not scraper._bg_tasks
+
+
+def test_close_simultaneo_fecha_o_navegador_uma_vez() -> None:
+    scraper = UtfprScraperAsync()
+    closes: list[str] = []
+
+    class _Closable:
+        def __init__(self, name: str) -> None:
+            self.name = name
+
+        async def close(self) -> None:
+            closes.append(self.name)
+            await asyncio.sleep(0.01)
+
+    scraper.page, scraper._context, scraper._browser = (
+        _Closable("page"),
+        _Closable("context"),
+        _Closable("browser"),
+    )
+
+    async def _run() -> None:
+        await asyncio.gather(scraper.force_close(), scraper.close())
+
+    asyncio.run(_run())
+    assert sorted(closes) == ["browser", "context", "page"]
+    assert scraper.page is None and scraper._browser is None
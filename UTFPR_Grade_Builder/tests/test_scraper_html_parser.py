@@ -0,0 +1,67 @@
+import pytest
+from src.infra import selectors
+from src.infra.scraper_async import UtfprScraperAsync
+
+_LEGACY_HTML = """
+<html><body>
+<table border="1">
+  <tr><td class="t" colspan="9"><b>ELT73B - Eletronica Digital</b></td></tr>
+  <tr><td>Turma</td><td>Enq.</td><td>Vagas</td><td>Calouros</td><td>Reserva</td>
+      <td>Prioridade</td><td>Horário (dia/turno/aula)</td><td>Professor</td><td>Opt.</td></tr>
+  <tr><td class="sl">S01</td><td class="dn">oculto</td><td class="sc">P</td><td class="sc">40</td>
+      <td class="sc">5</td><td class="sc">-</td><td class="sc">1</td>
+      <td class="sl">5T2(CE-208) - 5T3(CE-208)</td><td class="sl">Fulano</td>
+      <td class="sc">N</td></tr>
+</table>
+</body></html>
+"""
+
+
+def test_iter_utfpr_rows_from_html_ignora_cabecalho_e_coluna_oculta() -> None:
+    rows = list(UtfprScraperAsync._iter_utfpr_rows_from_html(_LEGACY_HTML))
+    assert len(rows) == 1
+    row = rows[0]
+    assert row["disciplina_codigo"] == "ELT73B"
+    assert row["disciplina_nome"] == "Eletronica Digital"
+    assert row["turma_codigo"] == "S01"
+    assert row["vagas_total"] == "40"
+    assert row["horario_raw"] == "5T2(CE-208) - 5T3(CE-208)"
+    assert row["professor"] == "Fulano"
+
+
+def test_column_index_map_usa_primeira_coluna_de_cada_campo() -> None:
+    headers = ["Turma", "Horário", "Professor", "Vagas", "Calouros", "Situação"]
+    mapping = UtfprScraperAsync._column_index_map(headers)
+    assert mapping["turma_codigo"] == 0
+    assert mapping["horario_raw"] == 1
+    assert mapping["professor"] == 2
+    assert mapping["vagas_total"] == 3
+    assert mapping["vagas_calouros"] == 4
+    assert mapping["status"] == 5
+    assert "prioridade" not in mapping
+
+
+def _column_index_map_por_campo(headers: list[str]) -> dict[str, int]:
+    """Referencia: o mapeamento original, campo a campo sobre todos os cabecalhos."""
+    normalized = [UtfprScraperAsync._norm(h) for h in headers]
+    mapping: dict[str, int] = {}
+    for field, hints in selectors.COLUMN_HINTS.items():
+        for idx, head in enumerate(normalized):
+            if any(UtfprScraperAsync._norm(hint) in head for hint in hints):
+                mapping[field] = idx
+                break
+    return mapping
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        ["Turma", "Enq.", "Vagas", "Calouros", "Reserva", "Prioridade", "Horário (dia/turno/aula)"],
+        ["Código da Turma", "Vagas Calouros", "Vagas Total", "SITUAÇÃO", "Professor(a)"],
+        ["Turma Horario Professor", "Status", "Status", "Vagas"],
+        ["", "Opt.", "Observação"],
+        [],
+    ],
+)
+def test_column_index_map_equivale_ao_mapeamento_por_campo(headers: list[str]) -> None:
+    assert UtfprScraperAsync._column_index_map(headers) == _column_index_map_por_campo(headers)
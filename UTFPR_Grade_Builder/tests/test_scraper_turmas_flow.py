@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import pytest
+from src.infra.scraper_async import UtfprScraperAsync
+
+_BASE_URL = "https://sistemas2.utfpr.edu.br/turmas"
+
+
+class _FakePage:
+    """Pagina com as turmas de cada pagina fixas, percorridas pelo botao "proxima" ou por URL."""
+
+    def __init__(self, pages: list[list[dict[str, str]]], links: list[list[object]]) -> None:
+        self.pages = pages
+        self.links = links
+        self.current = 0
+        self.url = _BASE_URL
+        self.gotos: list[str] = []
+
+    async def evaluate(self, script, arg=None):
+        # So a descoberta de links do paginador chega aqui; os demais acessos sao substituidos.
+        return self.links if self.current == 0 else []
+
+    async def goto(self, url, **kwargs) -> None:
+        self.gotos.append(url)
+        self.current = int(url.rsplit("=", 1)[1]) - 1
+        self.url = url
+
+
+def _row(turma: str, horario: str, professor: str = "Fulano") -> dict[str, str]:
+    return {
+        "disciplina_codigo": "ELT73B",
+        "disciplina_nome": "Eletronica Digital",
+        "turma_codigo": turma,
+        "horario_raw": horario,
+        "professor": professor,
+    }
+
+
+def _scraper_with_pages(
+    pages: list[list[dict[str, str]]],
+    links: list[list[object]] | None = None,
+) -> tuple[UtfprScraperAsync, _FakePage, list[list[str]]]:
+    scraper = UtfprScraperAsync(headless=True)
+    fake = _FakePage(pages, links or [])
+    scraper.page = fake
+    fetched: list[list[str]] = []
+
+    async def _extract_page_rows(ctx, order):
+        return ("utfpr_js", fake.pages[fake.current], [], ("utfpr", fake.current))
+
+    async def _click_next_page(ctx, *, token=None):
+        if fake.current + 1 >= len(fake.pages):
+            return False
+        fake.current += 1
+        scraper._page_turn_kept_table = True
+        return True
+
+    async def _fetch_pages_concurrently(urls, **kwargs):
+        fetched.append(list(urls))
+        return [
+            scraper._utfpr_table_rows_to_turmas(fake.pages[int(url.rsplit("=", 1)[1]) - 1])
+            for url in urls
+        ]
+
+    async def _header_value(page):
+        return (None, None)
+
+    async def _wait_table_anchor(ctx, *, token=None):
+        return None
+
+    scraper._extract_page_rows = _extract_page_rows
+    scraper._click_next_page = _click_next_page
+    scraper._fetch_pages_concurrently = _fetch_pages_concurrently
+    scraper._header_value = _header_value
+    scraper._wait_table_anchor = _wait_table_anchor
+    return scraper, fake, fetched
+
+
+def _windowed_paginator(total: int, window: int) -> list[list[object]]:
+    """Links de `1 2 ... window ... total Proxima`, como o paginador em janela do portal."""
+    numbers = [*range(1, window + 1), total]
+    return [[n, f"{_BASE_URL}?page={n}"] for n in numbers]
+
+
+def test_fetch_turmas_abertas_entrega_turma_repetida_entre_paginas_uma_vez() -> None:
+    scraper, _fake, _fetched = _scraper_with_pages(
+        [
+            [_row("S01", "2M1", "Fulano"), _row("S02", "3M1", "Beltrano")],
+            # Mesma turma de novo (outro professor) e uma turma nova.
+            [_row("S01", "2M1", "Ciclano"), _row("S03", "4M1", "Beltrano")],
+        ]
+    )
+
+    turmas = asyncio.run(scraper.fetch_turmas_abertas())
+
+    assert [t.turma_codigo for t in turmas] == ["S01", "S02", "S03"]
+    assert len({t.uid() for t in turmas}) == 3
+    # Vale a primeira ocorrencia: a turma ja entregue na pagina 1 nao e substituida.
+    assert turmas[0].professor == "Fulano"
+
+
+def test_consecutive_page_urls_para_no_salto_do_paginador_em_janela() -> None:
+    urls, last_listed = UtfprScraperAsync._consecutive_page_urls(
+        _windowed_paginator(20, 5), limit=49
+    )
+    assert urls == [f"{_BASE_URL}?page={n}" for n in range(2, 6)]
+    assert last_listed == 20
+
+
+def test_paginador_em_janela_busca_links_e_segue_pela_proxima() -> None:
+    pages = [[_row(f"S{n:02d}", "2M1")] for n in range(1, 8)]
+    scraper, fake, fetched = _scraper_with_pages(pages, _windowed_paginator(20, 5))
+
+    turmas = asyncio.run(scraper.fetch_turmas_abertas())
+
+    assert fetched == [[f"{_BASE_URL}?page={n}" for n in range(2, 6)]]
+    # Depois da janela, reabre a ultima pagina buscada e continua pelo botao "proxima".
+    assert fake.gotos == [f"{_BASE_URL}?page=5"]
+    assert [t.turma_codigo for t in turmas] == [f"S{n:02d}" for n in range(1, 8)]
+
+
+def test_paginador_em_janela_respeita_max_pages(caplog: pytest.LogCaptureFixture) -> None:
+    pages = [[_row(f"S{n:02d}", "2M1")] for n in range(1, 8)]
+    scraper, fake, fetched = _scraper_with_pages(pages, _windowed_paginator(20, 5))
+
+    with caplog.at_level(logging.WARNING):
+        turmas = asyncio.run(scraper.fetch_turmas_abertas(max_pages=3))
+
+    assert fetched == [[f"{_BASE_URL}?page=2", f"{_BASE_URL}?page=3"]]
+    assert fake.gotos == []
+    assert [t.turma_codigo for t in turmas] == ["S01", "S02", "S03"]
+    # O paginador lista ate a pagina 20: o limite cortou paginas de verdade.
+    assert "limite de seguranca" in caplog.text
+
+
+def test_paginador_com_todas_as_paginas_nao_reabre_nem_avisa(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    pages = [[_row(f"S{n:02d}", "2M1")] for n in range(1, 4)]
+    links = [[n, f"{_BASE_URL}?page={n}"] for n in range(1, 4)]
+    scraper, fake, fetched = _scraper_with_pages(pages, links)
+
+    with caplog.at_level(logging.WARNING):
+        turmas = asyncio.run(scraper.fetch_turmas_abertas(max_pages=3))
+
+    assert fetched == [[f"{_BASE_URL}?page=2", f"{_BASE_URL}?page=3"]]
+    # Todas as paginas estavam listadas: nada de reabrir a ultima e clicar em "proxima".
+    assert fake.gotos == []
+    assert [t.turma_codigo for t in turmas] == ["S01", "S02", "S03"]
+    assert "limite de seguranca" not in caplog.text
+
+
+def test_paginacao_pela_proxima_nao_avisa_ao_terminar_no_limite(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    pages = [[_row(f"S{n:02d}", "2M1")] for n in range(1, 4)]
+    scraper, _fake, _fetched = _scraper_with_pages(pages)
+
+    with caplog.at_level(logging.WARNING):
+        turmas = asyncio.run(scraper.fetch_turmas_abertas(max_pages=3))
+
+    assert [t.turma_codigo for t in turmas] == ["S01", "S02", "S03"]
+    assert "limite de seguranca" not in caplog.text
+
+    scraper, _fake, _fetched = _scraper_with_pages(pages)
+    with caplog.at_level(logging.WARNING):
+        asyncio.run(scraper.fetch_turmas_abertas(max_pages=2))
+    assert "limite de seguranca" in caplog.text